@@ -1,7 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from .models import Player
 
 
+class PlayerChangeList(ChangeList):
+    """
+    Change list that only selects the displayed columns.
+    """
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).only('id', *self.model_admin.list_display)
+
+
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
     """
@@ -77,6 +87,11 @@ class PlayerAdmin(admin.ModelAdmin):
         }),
     )
     
-    def get_queryset(self, request):
-        """Optimize admin queryset."""
-        return super().get_queryset(request).select_related()
+    def get_changelist(self, request, **kwargs):
+        """
+        Optimize the change list queryset.
+        
+        Player has no relations to join, so the change list only loads the
+        displayed columns. Other views (e.g. the change form) need every field.
+        """
+        return PlayerChangeList
@@ -0,0 +1,110 @@
+"""
+Cache keys and invalidation for data derived from the players table.
+
+The cache is an optimization only: when the backend is unreachable, reads
+miss, writes and invalidations are skipped with a warning, and callers
+fall through to the database.
+"""
+
+import hashlib
+import logging
+import time
+from urllib.parse import urlencode
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the cache backend is unavailable, not that a value is bad
+CACHE_ERRORS = (RedisError, OSError)
+
+# Player fields whose distinct values are served by the lookup endpoints
+LOOKUP_FIELDS = ('position', 'competition', 'squad', 'nation')
+LOOKUP_CACHE_TIMEOUT = 60 * 60
+
+LEADERBOARD_CACHE_TIMEOUT = 5 * 60
+SIMILAR_CACHE_TIMEOUT = 60 * 60
+
+# Response keys embed this version, so bumping it retires every cached
+# response at once without having to find and delete the keys
+DATA_VERSION_KEY = 'players:version'
+
+# Version used while the cache is down. It only moves when this process
+# bumps the version, so in-process state such as the similarity index
+# is not rebuilt per request; changes made by other processes show up
+# once the cache is back.
+_fallback_version = time.time_ns()
+
+
+def cache_get(key: str):
+    """Cached value for key, or None if it is missing or the cache is down."""
+    try:
+        return cache.get(key)
+    except CACHE_ERRORS as e:
+        logger.warning(f'Cache read of {key} failed: {e}')
+        return None
+
+
+def cache_set(key: str, value, timeout: int):
+    """Store a value, skipping it if the cache is down."""
+    try:
+        cache.set(key, value, timeout)
+    except CACHE_ERRORS as e:
+        logger.warning(f'Cache write of {key} failed: {e}')
+
+
+def cache_get_or_set(key: str, default, timeout: int):
+    """Cached value for key, computing and storing default() on a miss."""
+    value = cache_get(key)
+    if value is None:
+        value = default()
+        cache_set(key, value, timeout)
+    return value
+
+
+def lookup_cache_key(field: str) -> str:
+    """Cache key for the distinct values of a lookup field."""
+    return f'players:distinct:{field}'
+
+
+def clear_lookup_cache():
+    """Drop the cached lookup values so the next request rebuilds them."""
+    try:
+        cache.delete_many([lookup_cache_key(field) for field in LOOKUP_FIELDS])
+    except CACHE_ERRORS as e:
+        logger.warning(f'Clearing cached lookup values failed: {e}')
+
+
+def data_version() -> int:
+    """Current version of the player data, as embedded in response keys."""
+    try:
+        # Seeding from the clock keeps an evicted version from reviving old keys
+        return cache.get_or_set(DATA_VERSION_KEY, time.time_ns, None)
+    except CACHE_ERRORS as e:
+        logger.warning(f'Reading the player data version failed: {e}')
+        return _fallback_version
+
+
+def bump_data_version():
+    """Retire every cached response derived from player rows."""
+    global _fallback_version
+    _fallback_version = time.time_ns()
+    try:
+        try:
+            cache.incr(DATA_VERSION_KEY)
+        except ValueError:
+            cache.set(DATA_VERSION_KEY, time.time_ns(), None)
+    except CACHE_ERRORS as e:
+        logger.warning(f'Bumping the player data version failed: {e}')
+
+
+def leaderboard_cache_key(stat: str, limit: int, filter_values: dict) -> str:
+    """Cache key for a leaderboard response, covering its filter values."""
+    params = urlencode(sorted(filter_values.items()), doseq=True)
+    digest = hashlib.md5(params.encode()).hexdigest()
+    return f'players:leaderboard:{data_version()}:{stat}:{limit}:{digest}'
+
+
+def similar_cache_key(player_id: int, method: str, limit: int) -> str:
+    """Cache key for a similar-players response."""
+    return f'players:similar:{data_version()}:{player_id}:{method}:{limit}'
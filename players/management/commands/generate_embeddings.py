@@ -1,11 +1,24 @@
 import logging
+from itertools import islice
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from players.models import Player
+from django.db import connection, transaction
+from django.db.models import Q
+from players.caching import bump_data_version
+from players.models import Player, STYLE_INPUT_FIELDS
 from players.vector_search import generate_all_embeddings
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_SOURCE_FIELDS = ('id', *STYLE_INPUT_FIELDS, 'style_description', 'style_input_hash')
+EMBEDDING_FIELDS = ['style_description', 'style_embedding', 'style_input_hash']
+
+
+def _chunked(iterable, size):
+    """Yield successive lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
 
 class Command(BaseCommand):
     help = 'Generate style descriptions and embeddings for all players'
@@ -27,47 +40,70 @@ class Command(BaseCommand):
             type=int,
             help='Generate embedding for specific player ID only'
         )
+        parser.add_argument(
+            '--exact-count',
+            action='store_true',
+            help='Report exact player counts up front instead of a fast estimate'
+        )
 
     def handle(self, *args, **options):
         batch_size = options['batch_size']
         force = options['force']
         player_id = options['player_id']
+        exact_count = options['exact_count']
 
         try:
             if player_id:
                 # Generate for specific player
                 try:
                     player = Player.objects.get(id=player_id)
-                    self._generate_player_embedding(player, force)
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Generated embedding for player {player.name}')
-                    )
+                    if self._generate_embeddings([player], force):
+                        player.save(update_fields=EMBEDDING_FIELDS)
+                        self.stdout.write(
+                            self.style.SUCCESS(f'Generated embedding for player {player.name}')
+                        )
+                    else:
+                        self.stdout.write(f'Embedding for player {player.name} is up to date')
                 except Player.DoesNotExist:
                     raise CommandError(f'Player with ID {player_id} not found')
             else:
                 # Generate for all players
-                total_players = Player.objects.count()
-                self.stdout.write(f'Found {total_players} players to process')
-
+                players = Player.objects.all()
                 if not force:
-                    # Check how many already have embeddings
-                    with_embeddings = Player.objects.filter(
-                        style_description__isnull=False
-                    ).count()
-                    self.stdout.write(f'{with_embeddings} players already have embeddings')
+                    # Only fetch players without a current embedding. Player.save()
+                    # clears style_input_hash once the statistics change, and
+                    # _generate_embeddings still compares the hash of each row
+                    players = players.filter(
+                        Q(style_input_hash__isnull=True) | Q(style_input_hash='')
+                        | Q(style_description__isnull=True) | Q(style_description='')
+                    )
+
+                if exact_count:
+                    self.stdout.write(f'Found {players.count()} players to process')
+                else:
+                    # Counting means scanning the table
+                    self.stdout.write(f'About {Player.estimated_count()} players in the database')
+
+                # Stream players in a single pass instead of OFFSET slices,
+                # loading only the fields the embedding is built from
+                players = players.only(*EMBEDDING_SOURCE_FIELDS).order_by('id')
 
                 # Process in batches
                 processed = 0
-                for i in range(0, total_players, batch_size):
-                    batch_players = Player.objects.all()[i:i + batch_size]
-                    
+                batches = _chunked(players.iterator(chunk_size=batch_size), batch_size)
+                for batch_number, batch_players in enumerate(batches, start=1):
+                    to_update = self._generate_embeddings(batch_players, force)
+
+                    # One bulk UPDATE per batch instead of a save() per player
                     with transaction.atomic():
-                        for player in batch_players:
-                            if force or not player.style_description:
-                                self._generate_player_embedding(player, force=True)
-                                processed += 1
+                        self._save_embeddings(to_update)
+                    processed += len(to_update)
                     
-                    self.stdout.write(f'Processed batch {i//batch_size + 1}: {processed} players updated')
+                    self.stdout.write(f'Processed batch {batch_number}: {processed} players updated')
+
+                # bulk_update() bypasses the post_save signal
+                if processed:
+                    bump_data_version()
 
                 self.stdout.write(
                     self.style.SUCCESS(f'Successfully generated embeddings for {processed} players')
@@ -77,22 +113,65 @@ class Command(BaseCommand):
             logger.error(f'Error generating embeddings: {e}')
             raise CommandError(f'Error generating embeddings: {str(e)}')
 
-    def _generate_player_embedding(self, player: Player, force: bool = False):
+    def _generate_embeddings(self, players, force: bool = False):
         """
-        Generate embedding for a single player.
+        Generate embeddings for a batch of players.
+
+        Only updates the instances; callers are responsible for saving them.
+        Players whose statistics haven't changed since the stored embedding
+        was built are skipped. Returns the players that were updated.
         """
-        try:
-            # Generate style description
-            style_description = player.generate_style_description()
-            
-            # Generate statistics vector
-            stats_vector = player.get_statistics_vector()
-            
-            # Update player
+        to_update = []
+        for player in players:
+            input_hash = player.get_style_input_hash()
+            if not force and player.style_input_hash == input_hash and player.style_description:
+                continue
+
+            player.style_input_hash = input_hash
+            to_update.append(player)
+
+        # Generate style descriptions and statistics vectors for the whole batch at once
+        style_descriptions = Player.generate_style_descriptions(to_update)
+        stats_matrix = Player.compute_statistics_matrix(to_update)
+        for player, style_description, stats_vector in zip(to_update, style_descriptions, stats_matrix):
             player.style_description = style_description
-            player.style_embedding = stats_vector
-            player.save(update_fields=['style_description', 'style_embedding'])
-            
-        except Exception as e:
-            logger.error(f'Error generating embedding for player {player.id}: {e}')
-            raise 
\ No newline at end of file
+            player.style_embedding = stats_vector.tobytes()
+
+        return to_update
+
+    def _save_embeddings(self, players):
+        """Write the embedding fields of ``players`` back to the database."""
+        if connection.vendor == 'postgresql':
+            for chunk in _chunked(players, 500):
+                self._raw_bulk_update_embeddings(chunk)
+        else:
+            Player.objects.bulk_update(players, EMBEDDING_FIELDS, batch_size=500)
+
+    def _raw_bulk_update_embeddings(self, players):
+        """
+        Update embeddings with a single UPDATE ... FROM (VALUES ...) statement.
+
+        bulk_update() builds a CASE WHEN per field and row, which PostgreSQL
+        has to evaluate for every matched row; joining against a VALUES list
+        keeps the statement small and lets the planner use a plain join.
+        """
+        from psycopg2.extras import execute_values
+
+        quote = connection.ops.quote_name
+        table = quote(Player._meta.db_table)
+        assignments = ', '.join(
+            f'{quote(Player._meta.get_field(field).column)} = data.{quote(field)}'
+            for field in EMBEDDING_FIELDS
+        )
+        columns = ', '.join(quote(field) for field in ('id', *EMBEDDING_FIELDS))
+        sql = (
+            f'UPDATE {table} SET {assignments} '
+            f'FROM (VALUES %s) AS data({columns}) '
+            f'WHERE {table}.{quote(Player._meta.pk.column)} = data.{quote("id")}'
+        )
+        rows = [
+            (player.id, *(getattr(player, field) for field in EMBEDDING_FIELDS))
+            for player in players
+        ]
+        with connection.cursor() as cursor:
+            execute_values(cursor, sql, rows, page_size=len(rows))
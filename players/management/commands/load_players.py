@@ -1,8 +1,187 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+import django
 import pandas as pd
 import numpy as np
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from players.models import Player
+from django.db import connection, transaction
+from django.utils import timezone
+from players.caching import bump_data_version, clear_lookup_cache
+from players.models import Player, RATE_FIELDS
+
+
+# CSV column for each model field, grouped by target type so a whole
+# column can be converted in one vectorized pass.
+STRING_FIELDS = {
+    'name': 'Player',
+    'nation': 'Nation',
+    'position': 'Pos',
+    'squad': 'Squad',
+    'competition': 'Comp',
+}
+
+INTEGER_FIELDS = {
+    'rank': 'Rk',
+    'born_year': 'Born',
+
+    # Playing time
+    'matches_played': 'MP',
+    'starts': 'Starts',
+    'minutes': 'Min',
+
+    # Goals and assists
+    'goals': 'Gls',
+    'assists': 'Ast',
+    'goals_assists': 'G+A',
+    'goals_minus_penalties': 'G-PK',
+    'penalties_scored': 'PK',
+    'penalties_attempted': 'PKatt',
+
+    # Cards
+    'yellow_cards': 'CrdY',
+    'red_cards': 'CrdR',
+
+    # Shooting stats
+    'shots': 'Sh',
+    'shots_on_target': 'SoT',
+
+    # Passing stats
+    'passes_completed': 'Cmp',
+    'passes_attempted': 'Att',
+    'key_passes': 'KP',
+
+    # Defensive stats
+    'tackles': 'Tkl',
+    'tackles_won': 'TklW',
+    'interceptions': 'Int',
+    'blocks': 'Sh_stats_defense',
+    'clearances': 'Clr',
+
+    # Possession stats
+    'touches': 'Touches',
+    'dribbles_attempted': 'Att_stats_possession',
+    'dribbles_successful': 'Succ',
+
+    # Performance metrics
+    'progressive_carries': 'PrgC',
+    'progressive_passes': 'PrgP',
+    'progressive_receptions': 'PrgR',
+}
+
+FLOAT_FIELDS = {
+    'age': 'Age',
+    'minutes_per_90': '90s',
+
+    # Advanced stats
+    'expected_goals': 'xG',
+    'expected_goals_non_penalty': 'npxG',
+    'expected_assists': 'xAG',
+
+    # Shooting stats
+    'shots_on_target_percentage': 'SoT%',
+    'shots_per_90': 'Sh/90',
+    'shots_on_target_per_90': 'SoT/90',
+
+    # Passing stats
+    'pass_completion_percentage': 'Cmp%',
+
+    # Possession stats
+    'dribble_success_percentage': 'Succ%',
+}
+
+# Goalkeeper stats are only stored for GKs and left NULL for everyone else
+GOALKEEPER_INTEGER_FIELDS = {
+    'shots_faced': 'SoTA',
+    'saves': 'Saves',
+    'clean_sheets': 'CS',
+}
+
+GOALKEEPER_FLOAT_FIELDS = {
+    'goals_against': 'GA',
+    'goals_against_per_90': 'GA90',
+    'save_percentage': 'Save%',
+}
+
+# Every CSV column the loader reads; the rest of the file is skipped at parse time
+CSV_COLUMNS = frozenset({
+    *STRING_FIELDS.values(), *INTEGER_FIELDS.values(), *FLOAT_FIELDS.values(),
+    *GOALKEEPER_INTEGER_FIELDS.values(), *GOALKEEPER_FLOAT_FIELDS.values(),
+})
+
+
+def _numeric_column(df, column, default=0):
+    """
+    Parse a numeric CSV column, stripping thousands separators.
+
+    read_csv already converts well-formed columns, so the string cleanup
+    only runs for columns it left as text.
+    """
+    if column not in df:
+        return pd.Series(default, index=df.index)
+
+    values = df[column]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(
+            values.astype(str).str.replace(',', '', regex=False),
+            errors='coerce'
+        )
+    return values.fillna(default)
+
+
+def _string_column(df, column, default=''):
+    """Parse a text CSV column, stripping surrounding whitespace."""
+    if column not in df:
+        return pd.Series(default, index=df.index)
+
+    return df[column].fillna(default).astype(str).str.strip()
+
+
+def vectorize_batch(df):
+    """
+    Convert a batch of CSV rows into model field columns.
+
+    Each field is cast column-wise with pandas instead of per cell, and
+    rows missing a name or position are dropped.
+    """
+    out = {}
+    for field, column in STRING_FIELDS.items():
+        out[field] = _string_column(df, column)
+    for field, column in INTEGER_FIELDS.items():
+        out[field] = _numeric_column(df, column).astype('int64')
+    for field, column in FLOAT_FIELDS.items():
+        out[field] = _numeric_column(df, column).astype('float64')
+    out_df = pd.DataFrame(out, index=df.index)
+
+    # Normalize special characters for sorting
+    out_df['last_name'] = (
+        out_df['name'].str.split().str[-1].fillna('')
+        .str.normalize('NFD')
+        .str.encode('ascii', 'ignore')
+        .str.decode('ascii')
+        .str.lower()
+    )
+
+    # Derived rates, rounded with Python's round() like Player.update_rates
+    for field, (numerator, denominator, decimals) in RATE_FIELDS.items():
+        out_df[field] = [
+            round(total / periods, decimals) if periods > 0 else 0.0
+            for total, periods in zip(out_df[numerator].tolist(), out_df[denominator].tolist())
+        ]
+
+    # Add goalkeeper stats if available (only for GKs)
+    is_goalkeeper = out_df['position'].str.upper() == 'GK'
+    for field, column in GOALKEEPER_INTEGER_FIELDS.items():
+        values = _numeric_column(df, column).astype('int64')
+        out_df[field] = values.astype(object).where(is_goalkeeper, None)
+    for field, column in GOALKEEPER_FLOAT_FIELDS.items():
+        values = _numeric_column(df, column).astype('float64')
+        out_df[field] = values.astype(object).where(is_goalkeeper, None)
+
+    # Validate required fields
+    return out_df[(out_df['name'] != '') & (out_df['position'] != '')]
 
 
 class Command(BaseCommand):
@@ -22,45 +201,130 @@ class Command(BaseCommand):
         parser.add_argument(
             '--batch-size',
             type=int,
-            default=1000,
-            help='Number of records to process in each batch (default: 1000)'
+            default=10000,
+            help='Number of records to process in each batch (default: 10000)'
+        )
+        parser.add_argument(
+            '--commit-every',
+            type=int,
+            help='Commit after every N batches (default: a single transaction for the whole file). '
+                 'With --clear, the old rows are deleted in the first group, so a later failure '
+                 'leaves only the groups committed before it'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=min(os.cpu_count() or 1, 4),
+            help='Number of worker processes used to parse batches (default: CPU count, max 4)'
+        )
+        parser.add_argument(
+            '--rebuild-indexes',
+            action='store_true',
+            help='Drop secondary indexes during the load and rebuild them afterwards (requires --clear)'
         )
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
         clear_data = options['clear']
         batch_size = options['batch_size']
+        commit_every = options['commit_every']
+        jobs = options['jobs']
+        rebuild_indexes = options['rebuild_indexes']
+
+        for option, value in (('--batch-size', batch_size), ('--commit-every', commit_every), ('--jobs', jobs)):
+            if value is not None and value < 1:
+                raise CommandError(f'{option} must be at least 1, got {value}')
 
         try:
-            # Read CSV file
+            # Read CSV file one batch at a time so memory stays flat
             self.stdout.write(f'Reading CSV file: {csv_file}')
-            df = pd.read_csv(csv_file)
-            
-            self.stdout.write(f'Found {len(df)} rows in CSV file')
-            self.stdout.write(f'Columns: {list(df.columns)[:10]}...') # Show first 10 columns
-            
-            # Clear existing data if requested
-            if clear_data:
-                self.stdout.write('Clearing existing player data...')
-                Player.objects.all().delete()
-                self.stdout.write('Existing data cleared.')
-
-            # Process data in batches
-            total_created = 0
-            total_errors = 0
-            
-            for start_idx in range(0, len(df), batch_size):
-                end_idx = min(start_idx + batch_size, len(df))
-                batch_df = df.iloc[start_idx:end_idx]
-                
-                self.stdout.write(f'Processing batch {start_idx + 1}-{end_idx} of {len(df)}')
-                
-                created, errors = self.process_batch(batch_df)
-                total_created += created
-                total_errors += errors
-                
-                self.stdout.write(f'Batch complete: {created} created, {errors} errors')
+            with pd.read_csv(
+                csv_file,
+                chunksize=batch_size,
+                usecols=lambda column: column in CSV_COLUMNS,
+                thousands=',',
+                na_values=[','],
+                dtype={column: str for column in STRING_FIELDS.values()},
+            ) as reader:
+                # Peek at the first two batches to decide whether a worker pool pays off
+                batches = iter(reader)
+                head = list(islice(batches, 2))
+                batches = chain(head, batches)
+
+                if head:
+                    self.stdout.write(f'Columns: {list(head[0].columns)[:10]}...') # Show first 10 columns
+
+                # Building indexes once after the load is cheaper than updating
+                # them on every insert
+                index_definitions = []
+                if rebuild_indexes:
+                    if clear_data:
+                        index_definitions = self._drop_indexes()
+                        self.stdout.write(f'Dropped {len(index_definitions)} indexes')
+                    else:
+                        self.stdout.write(
+                            self.style.WARNING('--rebuild-indexes requires --clear; keeping existing indexes')
+                        )
+
+                # Process data in batches
+                total_rows = 0
+                total_created = 0
+                total_errors = 0
+
+                # Parse batches in worker processes while this process writes them.
+                # Workers never touch the database, so connections stay bounded.
+                executor = None
+                if jobs > 1 and len(head) > 1:
+                    if connection.in_atomic_block:
+                        # Closing the connection would break the caller's transaction
+                        self.stdout.write(
+                            self.style.WARNING('Called inside a transaction; parsing batches in this process')
+                        )
+                    else:
+                        # Forked workers must not inherit an open DB connection, so
+                        # start them all before the first transaction reconnects
+                        connection.close()
+                        executor = ProcessPoolExecutor(max_workers=jobs, initializer=django.setup)
+                        executor.submit(os.getpid).result()
+
+                try:
+                    pending = self._read_ahead(batches, executor, jobs)
+                    clear_pending = clear_data
+                    while True:
+                        # One transaction per group of batches amortizes commit overhead
+                        group_size = 0
+                        with transaction.atomic():
+                            # Clearing in the first group's transaction keeps the
+                            # old rows if that group fails
+                            if clear_pending:
+                                self._clear_players()
+                                clear_pending = False
+                            for batch_df, parsed in islice(pending, commit_every):
+                                group_size += 1
+                                start_idx = batch_df.index[0]
+                                end_idx = start_idx + len(batch_df)
+                                total_rows += len(batch_df)
+
+                                self.stdout.write(f'Processing batch {start_idx + 1}-{end_idx}')
+
+                                created, errors = self.process_batch(batch_df, parsed)
+                                total_created += created
+                                total_errors += errors
+
+                                self.stdout.write(f'Batch complete: {created} created, {errors} errors')
+                        if not commit_every or group_size < commit_every:
+                            break
+                finally:
+                    if executor:
+                        executor.shutdown(cancel_futures=True)
+                    if index_definitions:
+                        self._create_indexes(index_definitions)
+                        self.stdout.write(f'Rebuilt {len(index_definitions)} indexes')
+                    # Bulk inserts and deletes bypass the model signals
+                    clear_lookup_cache()
+                    bump_data_version()
 
+            self.stdout.write(f'Read {total_rows} rows from CSV file')
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Successfully loaded {total_created} players with {total_errors} errors'
@@ -72,155 +336,149 @@ class Command(BaseCommand):
         except Exception as e:
             raise CommandError(f'Error processing CSV file: {str(e)}')
 
-    def process_batch(self, batch_df):
-        """Process a batch of player records."""
+    def _clear_players(self):
+        """Delete every existing player."""
+        self.stdout.write('Clearing existing player data...')
+        # A plain DELETE: Player.objects.all().delete() would fetch
+        # every row to send post_delete, and the caches are reset
+        # once the load finishes anyway
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(Player._meta.db_table)}')
+        self.stdout.write('Existing data cleared.')
+
+    def _read_ahead(self, batches, executor, jobs):
+        """
+        Yield (batch_df, parsed) pairs in file order.
+
+        With an executor, up to ``jobs`` batches beyond the current one are
+        submitted for parsing so workers stay busy without the whole file
+        being held in memory; ``parsed`` is the batch's future, else None.
+        """
+        if executor is None:
+            for batch_df in batches:
+                yield batch_df, None
+            return
+
+        queued = deque()
+        for batch_df in batches:
+            queued.append((batch_df, executor.submit(vectorize_batch, batch_df)))
+            if len(queued) > jobs:
+                yield queued.popleft()
+        while queued:
+            yield queued.popleft()
+
+    def process_batch(self, batch_df, parsed=None):
+        """
+        Process a batch of player records.
+
+        ``parsed`` is an optional future holding the batch already converted
+        by a worker process; otherwise the batch is converted here.
+        """
         created_count = 0
         error_count = 0
-        players_to_create = []
 
-        for index, row in batch_df.iterrows():
-            try:
-                player_data = self.extract_player_data(row)
-                if player_data:
-                    players_to_create.append(Player(**player_data))
-            except Exception as e:
-                self.stdout.write(
-                    self.style.WARNING(f'Error processing row {index}: {str(e)}')
-                )
-                error_count += 1
+        try:
+            players_df = parsed.result() if parsed else vectorize_batch(batch_df)
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f'Error extracting data from batch: {str(e)}')
+            )
+            return created_count, len(batch_df)
 
         # Bulk create players
-        if players_to_create:
+        if not players_df.empty:
             try:
+                # Savepoint so a failed batch doesn't abort the outer transaction
                 with transaction.atomic():
-                    Player.objects.bulk_create(players_to_create, ignore_conflicts=True)
-                    created_count = len(players_to_create)
+                    if connection.vendor == 'postgresql':
+                        self._copy_dataframe(players_df)
+                    else:
+                        players_to_create = [
+                            Player(**record) for record in players_df.to_dict('records')
+                        ]
+                        Player.objects.bulk_create(players_to_create, ignore_conflicts=True)
+                    created_count = len(players_df)
             except Exception as e:
                 self.stdout.write(
                     self.style.ERROR(f'Error bulk creating players: {str(e)}')
                 )
-                error_count += len(players_to_create)
+                error_count += len(players_df)
 
         return created_count, error_count
 
-    def extract_player_data(self, row):
-        """Extract player data from CSV row and map to model fields."""
-        try:
-            # Helper function to safely convert values
-            def safe_float(value, default=0.0):
-                if pd.isna(value) or value == '' or value == ',':
-                    return default
-                try:
-                    return float(str(value).replace(',', ''))
-                except (ValueError, TypeError):
-                    return default
+    def _drop_indexes(self):
+        """
+        Drop the players table's secondary indexes.
 
-            def safe_int(value, default=0):
-                if pd.isna(value) or value == '' or value == ',':
-                    return default
-                try:
-                    return int(float(str(value).replace(',', '')))
-                except (ValueError, TypeError):
-                    return default
-
-            def safe_str(value, default=''):
-                if pd.isna(value) or value == '':
-                    return default
-                return str(value).strip()
-
-            # Extract basic information
-            full_name = safe_str(row.get('Player'))
-            last_name = full_name.split()[-1] if full_name else ''
-            
-            # Normalize special characters for sorting
-            import unicodedata
-            normalized_last_name = unicodedata.normalize('NFD', last_name).encode('ascii', 'ignore').decode('ascii').lower()
-            
-            player_data = {
-                'rank': safe_int(row.get('Rk')),
-                'name': full_name,
-                'last_name': normalized_last_name,
-                'nation': safe_str(row.get('Nation')),
-                'position': safe_str(row.get('Pos')),
-                'squad': safe_str(row.get('Squad')),
-                'competition': safe_str(row.get('Comp')),
-                'age': safe_float(row.get('Age')),
-                'born_year': safe_int(row.get('Born')),
-                
-                # Playing time
-                'matches_played': safe_int(row.get('MP')),
-                'starts': safe_int(row.get('Starts')),
-                'minutes': safe_int(row.get('Min')),
-                'minutes_per_90': safe_float(row.get('90s')),
-                
-                # Goals and assists
-                'goals': safe_int(row.get('Gls')),
-                'assists': safe_int(row.get('Ast')),
-                'goals_assists': safe_int(row.get('G+A')),
-                'goals_minus_penalties': safe_int(row.get('G-PK')),
-                'penalties_scored': safe_int(row.get('PK')),
-                'penalties_attempted': safe_int(row.get('PKatt')),
-                
-                # Cards
-                'yellow_cards': safe_int(row.get('CrdY')),
-                'red_cards': safe_int(row.get('CrdR')),
-                
-                # Advanced stats
-                'expected_goals': safe_float(row.get('xG')),
-                'expected_goals_non_penalty': safe_float(row.get('npxG')),
-                'expected_assists': safe_float(row.get('xAG')),
-                
-                # Shooting stats
-                'shots': safe_int(row.get('Sh')),
-                'shots_on_target': safe_int(row.get('SoT')),
-                'shots_on_target_percentage': safe_float(row.get('SoT%')),
-                'shots_per_90': safe_float(row.get('Sh/90')),
-                'shots_on_target_per_90': safe_float(row.get('SoT/90')),
-                
-                # Passing stats
-                'passes_completed': safe_int(row.get('Cmp')),
-                'passes_attempted': safe_int(row.get('Att')),
-                'pass_completion_percentage': safe_float(row.get('Cmp%')),
-                'key_passes': safe_int(row.get('KP')),
-                
-                # Defensive stats
-                'tackles': safe_int(row.get('Tkl')),
-                'tackles_won': safe_int(row.get('TklW')),
-                'interceptions': safe_int(row.get('Int')),
-                'blocks': safe_int(row.get('Sh_stats_defense')),
-                'clearances': safe_int(row.get('Clr')),
-                
-                # Possession stats
-                'touches': safe_int(row.get('Touches')),
-                'dribbles_attempted': safe_int(row.get('Att_stats_possession')),
-                'dribbles_successful': safe_int(row.get('Succ')),
-                'dribble_success_percentage': safe_float(row.get('Succ%')),
-                
-                # Performance metrics
-                'progressive_carries': safe_int(row.get('PrgC')),
-                'progressive_passes': safe_int(row.get('PrgP')),
-                'progressive_receptions': safe_int(row.get('PrgR')),
-            }
-
-            # Add goalkeeper stats if available (only for GKs)
-            if safe_str(row.get('Pos')).upper() == 'GK':
-                player_data.update({
-                    'goals_against': safe_float(row.get('GA')),
-                    'goals_against_per_90': safe_float(row.get('GA90')),
-                    'shots_faced': safe_int(row.get('SoTA')),
-                    'saves': safe_int(row.get('Saves')),
-                    'save_percentage': safe_float(row.get('Save%')),
-                    'clean_sheets': safe_int(row.get('CS')),
-                })
-
-            # Validate required fields
-            if not player_data['name'] or not player_data['position']:
-                return None
-
-            return player_data
+        Returns their CREATE INDEX statements, read from the database
+        catalog, so _create_indexes can rebuild them exactly.
+        """
+        table = Player._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    """
+                    SELECT index_class.relname, pg_get_indexdef(index_class.oid)
+                    FROM pg_index
+                    JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+                    WHERE pg_index.indrelid = %s::regclass
+                      AND NOT pg_index.indisprimary
+                      AND NOT pg_index.indisunique
+                    """,
+                    [table]
+                )
+            elif connection.vendor == 'sqlite':
+                cursor.execute(
+                    """
+                    SELECT name, sql FROM sqlite_master
+                    WHERE type = 'index' AND tbl_name = %s
+                      AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%'
+                    """,
+                    [table]
+                )
+            else:
+                self.stdout.write(
+                    self.style.WARNING(f'Index rebuild is not supported on {connection.vendor}')
+                )
+                return []
 
-        except Exception as e:
-            self.stdout.write(
-                self.style.WARNING(f'Error extracting data from row: {str(e)}')
-            )
-            return None 
\ No newline at end of file
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+        return [definition for _, definition in indexes]
+
+    def _create_indexes(self, definitions):
+        """Recreate indexes dropped by _drop_indexes."""
+        with connection.cursor() as cursor:
+            for definition in definitions:
+                cursor.execute(definition)
+
+    def _copy_dataframe(self, df):
+        """
+        Stream a vectorized batch into PostgreSQL with COPY FROM STDIN.
+
+        Avoids the per-row INSERT overhead of bulk_create. Columns that
+        bulk_create would otherwise fill from model defaults are added here.
+        """
+        now = timezone.now()
+        df = df.assign(style_description='', created_at=now, updated_at=now)
+
+        quote = connection.ops.quote_name
+        columns = [quote(Player._meta.get_field(field).column) for field in df.columns]
+        # Empty strings must not be read back as NULL
+        text_columns = [
+            quote(Player._meta.get_field(field).column)
+            for field in (*STRING_FIELDS, 'last_name', 'style_description')
+        ]
+
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        sql = (
+            f'COPY {quote(Player._meta.db_table)} ({", ".join(columns)}) '
+            f'FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ({", ".join(text_columns)}))'
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
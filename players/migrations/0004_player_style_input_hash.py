@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-15 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0003_player_last_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='style_input_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash of the statistics the style embedding was generated from', max_length=32, null=True),
+        ),
+    ]
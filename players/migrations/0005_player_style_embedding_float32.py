@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-15 03:52
+
+import json
+
+import numpy as np
+from django.db import migrations, models
+
+
+def pack_embeddings(apps, schema_editor):
+    Player = apps.get_model('players', 'Player')
+    players = Player.objects.exclude(style_embedding__isnull=True).only('id', 'style_embedding')
+    for player in players.iterator():
+        vector = player.style_embedding
+        if isinstance(vector, str):
+            vector = json.loads(vector)
+        player.style_embedding_packed = np.asarray(vector, dtype=np.float32).tobytes()
+        player.save(update_fields=['style_embedding_packed'])
+
+
+def unpack_embeddings(apps, schema_editor):
+    Player = apps.get_model('players', 'Player')
+    players = Player.objects.exclude(style_embedding_packed__isnull=True).only('id', 'style_embedding_packed')
+    for player in players.iterator():
+        vector = np.frombuffer(player.style_embedding_packed, dtype=np.float32)
+        player.style_embedding = vector.tolist()
+        player.save(update_fields=['style_embedding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0004_player_style_input_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='style_embedding_packed',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_embeddings, unpack_embeddings),
+        migrations.RemoveField(
+            model_name='player',
+            name='style_embedding',
+        ),
+        migrations.RenameField(
+            model_name='player',
+            old_name='style_embedding_packed',
+            new_name='style_embedding',
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='style_embedding',
+            field=models.BinaryField(blank=True, help_text='Player style embedding vector (packed float32)', null=True),
+        ),
+    ]
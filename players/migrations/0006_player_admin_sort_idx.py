@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0005_player_style_embedding_float32'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['-goals', '-assists', 'name', '-id'], include=('position', 'squad', 'competition', 'nation', 'age', 'matches_played', 'minutes'), name='players_admin_sort_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-15 03:45
+
+from django.db import migrations, models
+
+
+RATE_FIELDS = {
+    'goals_per_90': ('goals', 'minutes_per_90', 2),
+    'assists_per_90': ('assists', 'minutes_per_90', 2),
+    'goal_contribution_per_90': ('goals_assists', 'minutes_per_90', 2),
+    'minutes_per_game': ('minutes', 'matches_played', 1),
+}
+
+
+def populate_rates(apps, schema_editor):
+    Player = apps.get_model('players', 'Player')
+    sources = {field for numerator, denominator, _ in RATE_FIELDS.values() for field in (numerator, denominator)}
+    players = list(Player.objects.only('id', *sources))
+    for player in players:
+        for field, (numerator, denominator, decimals) in RATE_FIELDS.items():
+            total = getattr(player, numerator)
+            periods = getattr(player, denominator)
+            setattr(player, field, round(total / periods, decimals) if periods > 0 else 0.0)
+    Player.objects.bulk_update(players, list(RATE_FIELDS), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0006_player_admin_sort_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='assists_per_90',
+            field=models.FloatField(db_index=True, default=0.0, help_text='Assists per 90 minutes'),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='goal_contribution_per_90',
+            field=models.FloatField(db_index=True, default=0.0, help_text='Goals + assists per 90 minutes'),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='goals_per_90',
+            field=models.FloatField(db_index=True, default=0.0, help_text='Goals per 90 minutes'),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='minutes_per_game',
+            field=models.FloatField(db_index=True, default=0.0, help_text='Average minutes per game'),
+        ),
+        migrations.RunPython(populate_rates, migrations.RunPython.noop),
+    ]
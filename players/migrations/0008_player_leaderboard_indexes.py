@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-15 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0007_player_rate_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['minutes'], name='players_minutes_93d94d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('position', 'GK')), fields=['-clean_sheets'], name='players_gk_clean_sheets_idx'),
+        ),
+    ]
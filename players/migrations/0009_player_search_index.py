@@ -0,0 +1,34 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+SEARCH_INDEX = GinIndex(
+    SearchVector('name', 'squad', 'nation', 'position', config='simple'),
+    name='players_search_idx',
+)
+
+
+def create_search_index(apps, schema_editor):
+    # Full-text GIN indexes only exist on PostgreSQL; search falls back to
+    # substring matching elsewhere
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('players', 'Player'), SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('players', 'Player'), SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0008_player_leaderboard_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
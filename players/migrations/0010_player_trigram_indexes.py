@@ -0,0 +1,38 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+
+TRIGRAM_INDEXES = [
+    GinIndex(fields=['name'], name='players_name_trgm', opclasses=['gin_trgm_ops']),
+    GinIndex(fields=['squad'], name='players_squad_trgm', opclasses=['gin_trgm_ops']),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm is PostgreSQL-only; search falls back to substring matching
+    # elsewhere
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    Player = apps.get_model('players', 'Player')
+    for index in TRIGRAM_INDEXES:
+        schema_editor.add_index(Player, index)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Player = apps.get_model('players', 'Player')
+    for index in TRIGRAM_INDEXES:
+        schema_editor.remove_index(Player, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0009_player_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
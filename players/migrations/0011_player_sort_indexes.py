@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-15 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0010_player_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='player',
+            name='goals_assists',
+            field=models.IntegerField(db_index=True, default=0, help_text='Goals + Assists'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('matches_played__gte', 5), ('minutes__gte', 450)), fields=['-goals', '-assists'], name='players_regular_sort_idx'),
+        ),
+    ]
@@ -1,9 +1,164 @@
-from django.db import models
+from django.db import models, connection
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+import hashlib
+import json
 import numpy as np
 
 
+# Fields read by Player.generate_style_description and get_statistics_vector
+STYLE_INPUT_FIELDS = (
+    'position', 'age', 'minutes_per_90', 'goals', 'assists',
+    'shots_on_target_percentage', 'pass_completion_percentage',
+    'dribble_success_percentage', 'save_percentage', 'tackles',
+    'interceptions', 'progressive_passes', 'progressive_carries',
+)
+
+# Fields read by Player.compute_statistics_matrix, in column order
+STATISTICS_VECTOR_FIELDS = (
+    'goals', 'assists', 'minutes_per_90', 'shots_on_target_percentage',
+    'pass_completion_percentage', 'dribble_success_percentage', 'tackles',
+    'interceptions', 'progressive_passes', 'progressive_carries', 'age',
+)
+# Length of the vectors built from STATISTICS_VECTOR_FIELDS (minutes_per_90
+# only scales the per-90 entries)
+STATISTICS_VECTOR_SIZE = 10
+
+# Stored rate fields as field -> (numerator, denominator, decimals), kept in
+# sync by Player.save() and computed column-wise by load_players
+RATE_FIELDS = {
+    'goals_per_90': ('goals', 'minutes_per_90', 2),
+    'assists_per_90': ('assists', 'minutes_per_90', 2),
+    'goal_contribution_per_90': ('goals_assists', 'minutes_per_90', 2),
+    'minutes_per_game': ('minutes', 'matches_played', 1),
+}
+RATE_SOURCE_FIELDS = frozenset(
+    field for numerator, denominator, _ in RATE_FIELDS.values() for field in (numerator, denominator)
+)
+
+# Fields read by Player.generate_style_descriptions; position comes first
+STYLE_DESCRIPTION_FIELDS = (
+    'position', 'goals', 'assists', 'tackles', 'pass_completion_percentage',
+    'save_percentage', 'dribble_success_percentage', 'shots_on_target_percentage',
+    'progressive_passes', 'progressive_carries', 'age',
+)
+
+# Style description rules as (label, condition) pairs, applied in order.
+# Each condition maps the batch's column arrays to a boolean mask.
+STYLE_RULES = (
+    # Position-based description
+    ('attacking player', lambda c: c['forward']),
+    ('prolific goalscorer', lambda c: c['forward'] & (c['goals'] > 10)),
+    ('creative playmaker', lambda c: c['forward'] & (c['assists'] > 5)),
+    ('midfielder', lambda c: c['midfielder']),
+    ('creative midfielder', lambda c: c['midfielder'] & (c['assists'] > 5)),
+    ('defensive midfielder', lambda c: c['midfielder'] & (c['tackles'] > 20)),
+    ('defender', lambda c: c['defender']),
+    ('strong tackler', lambda c: c['defender'] & (c['tackles'] > 30)),
+    ('ball-playing defender', lambda c: c['defender'] & (c['pass_completion_percentage'] > 85)),
+    ('goalkeeper', lambda c: c['goalkeeper']),
+    ('reliable shot-stopper', lambda c: c['goalkeeper'] & (c['save_percentage'] > 75)),
+
+    # Performance characteristics
+    ('skilled dribbler', lambda c: c['dribble_success_percentage'] > 60),
+    ('accurate passer', lambda c: c['pass_completion_percentage'] > 85),
+    ('clinical finisher', lambda c: c['shots_on_target_percentage'] > 50),
+
+    # Playing style
+    ('progressive passer', lambda c: c['progressive_passes'] > 50),
+    ('ball carrier', lambda c: c['progressive_carries'] > 30),
+
+    # Age and experience
+    ('young talent', lambda c: c['age'] < 23),
+    ('experienced player', lambda c: c['age'] > 30),
+)
+
+
+def _describe_styles(rows):
+    """
+    Apply STYLE_RULES to rows of STYLE_DESCRIPTION_FIELDS values.
+
+    Each rule is evaluated as one NumPy mask over all rows instead of
+    branching per player.
+    """
+    positions = np.array([row[0] for row in rows], dtype=str)
+    # Missing goalkeeper stats become NaN, which fails every comparison
+    stats = np.array([row[1:] for row in rows], dtype=np.float64).reshape(
+        -1, len(STYLE_DESCRIPTION_FIELDS) - 1
+    )
+    columns = dict(zip(STYLE_DESCRIPTION_FIELDS[1:], stats.T))
+
+    # A player only gets the description of their first listed role
+    forward = np.char.find(positions, 'FW') >= 0
+    midfielder = ~forward & (np.char.find(positions, 'MF') >= 0)
+    defender = ~forward & ~midfielder & (np.char.find(positions, 'DF') >= 0)
+    goalkeeper = ~forward & ~midfielder & ~defender & (np.char.find(positions, 'GK') >= 0)
+    columns.update(forward=forward, midfielder=midfielder, defender=defender, goalkeeper=goalkeeper)
+
+    description_parts = [[] for _ in rows]
+    for label, condition in STYLE_RULES:
+        for index in np.flatnonzero(condition(columns)):
+            description_parts[index].append(label)
+
+    return [" ".join(parts) if parts else "versatile player" for parts in description_parts]
+
+
+def _statistics_matrix(rows):
+    """
+    Build the float32 statistics matrix from rows of STATISTICS_VECTOR_FIELDS
+    values, one row per player.
+    """
+    stats = np.asarray(rows, dtype=np.float64).reshape(-1, len(STATISTICS_VECTOR_FIELDS))
+    (goals, assists, minutes_per_90, shot_accuracy, pass_accuracy, dribble_success,
+     tackles, interceptions, progressive_passes, progressive_carries, age) = stats.T
+
+    played = minutes_per_90 > 0
+    nineties = np.where(played, minutes_per_90, 1.0)
+
+    def per_90(values, scale):
+        return np.where(played, np.minimum(values / nineties / scale, 1.0), 0.0)
+
+    def percentage(values):
+        return np.where(values > 0, values / 100.0, 0.0)
+
+    # Normalize statistics to 0-1 range for better similarity comparison
+    goals_per_90 = np.where(played, np.round(goals / nineties, 2), 0.0)
+    assists_per_90 = np.where(played, np.round(assists / nineties, 2), 0.0)
+    matrix = np.column_stack([
+        np.clip(goals_per_90 / 1.0, 0.0, 1.0),
+        np.clip(assists_per_90 / 0.5, 0.0, 1.0),
+        percentage(shot_accuracy),
+        percentage(pass_accuracy),
+        percentage(dribble_success),
+        per_90(tackles, 5.0),
+        per_90(interceptions, 3.0),
+        per_90(progressive_passes, 10.0),
+        per_90(progressive_carries, 5.0),
+        np.minimum(age / 40.0, 1.0),
+    ])
+
+    return matrix.astype(np.float32)
+
+
+# Style descriptions keyed by their STYLE_DESCRIPTION_FIELDS values, so
+# identical statistics share a result and changed ones simply miss
+_style_description_cache = {}
+STYLE_DESCRIPTION_CACHE_SIZE = 50_000
+
+
+def _describe_styles_cached(rows):
+    """
+    _describe_styles for tuples of values, only computing rows not seen before.
+    The cache is cleared once it would outgrow STYLE_DESCRIPTION_CACHE_SIZE.
+    """
+    missing = [row for row in dict.fromkeys(rows) if row not in _style_description_cache]
+    if missing:
+        if len(_style_description_cache) + len(missing) > STYLE_DESCRIPTION_CACHE_SIZE:
+            _style_description_cache.clear()
+        _style_description_cache.update(zip(missing, _describe_styles(missing)))
+    return [_style_description_cache[row] for row in rows]
+
+
 class Player(models.Model):
     """
     Player model representing soccer players from top European leagues.
@@ -30,7 +185,7 @@ class Player(models.Model):
     # Goal and Assist Statistics
     goals = models.IntegerField(default=0, db_index=True, help_text="Goals scored")
     assists = models.IntegerField(default=0, db_index=True, help_text="Assists")
-    goals_assists = models.IntegerField(default=0, help_text="Goals + Assists")
+    goals_assists = models.IntegerField(default=0, db_index=True, help_text="Goals + Assists")
     goals_minus_penalties = models.IntegerField(default=0, help_text="Goals excluding penalties")
     penalties_scored = models.IntegerField(default=0, help_text="Penalty goals")
     penalties_attempted = models.IntegerField(default=0, help_text="Penalty attempts")
@@ -83,10 +238,17 @@ class Player(models.Model):
     progressive_passes = models.IntegerField(default=0, help_text="Progressive passes")
     progressive_receptions = models.IntegerField(default=0, help_text="Progressive pass receptions")
     
+    # Derived Rates (denormalized from the totals above, see RATE_FIELDS)
+    goals_per_90 = models.FloatField(default=0.0, db_index=True, help_text="Goals per 90 minutes")
+    assists_per_90 = models.FloatField(default=0.0, db_index=True, help_text="Assists per 90 minutes")
+    goal_contribution_per_90 = models.FloatField(default=0.0, db_index=True, help_text="Goals + assists per 90 minutes")
+    minutes_per_game = models.FloatField(default=0.0, db_index=True, help_text="Average minutes per game")
+    
     # Phase 2: Vector Search Fields
-    style_embedding = models.JSONField(null=True, blank=True, help_text="Player style embedding vector")
+    style_embedding = models.BinaryField(null=True, blank=True, help_text="Player style embedding vector (packed float32)")
     style_description = models.TextField(blank=True, help_text="Generated player style description")
     similarity_score = models.FloatField(null=True, blank=True, help_text="Similarity score for search results")
+    style_input_hash = models.CharField(max_length=32, null=True, blank=True, db_index=True, help_text="Hash of the statistics the style embedding was generated from")
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -101,108 +263,175 @@ class Player(models.Model):
             models.Index(fields=['goals', 'assists']),
             models.Index(fields=['age', 'position']),
             models.Index(fields=['nation', 'position']),
+            models.Index(fields=['minutes']),
+            # Goalkeeper leaderboards only ever rank goalkeepers
+            models.Index(
+                fields=['-clean_sheets'],
+                name='players_gk_clean_sheets_idx',
+                condition=models.Q(position='GK'),
+            ),
+            # The regular_players filter in its default goals/assists order
+            models.Index(
+                fields=['-goals', '-assists'],
+                name='players_regular_sort_idx',
+                condition=models.Q(matches_played__gte=5, minutes__gte=450),
+            ),
+            # Matches the default ordering (plus the admin's pk tiebreaker) and
+            # covers the admin change list columns for index-only scans
+            models.Index(
+                fields=['-goals', '-assists', 'name', '-id'],
+                name='players_admin_sort_idx',
+                include=['position', 'squad', 'competition', 'nation', 'age', 'matches_played', 'minutes'],
+            ),
         ]
     
     def __str__(self):
         return f"{self.name} ({self.squad}) - {self.position}"
     
-    @property
-    def goals_per_90(self):
-        """Calculate goals per 90 minutes"""
-        if self.minutes_per_90 > 0:
-            return round(self.goals / self.minutes_per_90, 2)
-        return 0.0
+    @classmethod
+    def estimated_count(cls):
+        """
+        Cheap row count estimate for progress messages.
+        Reads PostgreSQL's planner statistics instead of running COUNT(*);
+        falls back to an exact count on other databases or unanalyzed tables.
+        """
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [cls._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return row[0]
+        return cls.objects.count()
     
-    @property
-    def assists_per_90(self):
-        """Calculate assists per 90 minutes"""
-        if self.minutes_per_90 > 0:
-            return round(self.assists / self.minutes_per_90, 2)
-        return 0.0
+    def update_rates(self):
+        """Recompute the stored per-90 and per-game rates from the raw totals"""
+        for field, (numerator, denominator, decimals) in RATE_FIELDS.items():
+            total = getattr(self, numerator)
+            periods = getattr(self, denominator)
+            setattr(self, field, round(total / periods, decimals) if periods > 0 else 0.0)
     
-    @property
-    def goal_contribution_per_90(self):
-        """Calculate goals + assists per 90 minutes"""
-        if self.minutes_per_90 > 0:
-            return round(self.goals_assists / self.minutes_per_90, 2)
-        return 0.0
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.update_rates()
+            self.clear_stale_style_input_hash()
+        else:
+            update_fields = set(update_fields)
+            if RATE_SOURCE_FIELDS.intersection(update_fields):
+                self.update_rates()
+                update_fields.update(RATE_FIELDS)
+            if update_fields.intersection(STYLE_INPUT_FIELDS) and self.clear_stale_style_input_hash():
+                update_fields.add('style_input_hash')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
     
-    @property
-    def minutes_per_game(self):
-        """Calculate average minutes per game"""
-        if self.matches_played > 0:
-            return round(self.minutes / self.matches_played, 1)
-        return 0.0
+    def clear_stale_style_input_hash(self):
+        """
+        Clear style_input_hash once the statistics no longer match it, so
+        generate_embeddings can find outdated embeddings with a query.
+        Returns whether the hash was cleared.
+        """
+        if self.style_input_hash and self.style_input_hash != self.get_style_input_hash():
+            self.style_input_hash = None
+            return True
+        return False
+    
+    def get_style_input_hash(self):
+        """
+        Hash the statistics the style description and vector are built from.
+        Matching the stored style_input_hash means the embedding is current.
+        """
+        values = [getattr(self, field) for field in STYLE_INPUT_FIELDS]
+        return hashlib.blake2b(json.dumps(values).encode(), digest_size=16).hexdigest()
     
     def generate_style_description(self):
         """
         Generate a text description of the player's style based on their statistics.
         This will be used for NLP-based similarity search.
         """
-        description_parts = []
-        
-        # Position-based description
-        if 'FW' in self.position:
-            description_parts.append("attacking player")
-            if self.goals > 10:
-                description_parts.append("prolific goalscorer")
-            if self.assists > 5:
-                description_parts.append("creative playmaker")
-        elif 'MF' in self.position:
-            description_parts.append("midfielder")
-            if self.assists > 5:
-                description_parts.append("creative midfielder")
-            if self.tackles > 20:
-                description_parts.append("defensive midfielder")
-        elif 'DF' in self.position:
-            description_parts.append("defender")
-            if self.tackles > 30:
-                description_parts.append("strong tackler")
-            if self.pass_completion_percentage > 85:
-                description_parts.append("ball-playing defender")
-        elif 'GK' in self.position:
-            description_parts.append("goalkeeper")
-            if self.save_percentage and self.save_percentage > 75:
-                description_parts.append("reliable shot-stopper")
-        
-        # Performance characteristics
-        if self.dribble_success_percentage > 60:
-            description_parts.append("skilled dribbler")
-        if self.pass_completion_percentage > 85:
-            description_parts.append("accurate passer")
-        if self.shots_on_target_percentage > 50:
-            description_parts.append("clinical finisher")
-        
-        # Playing style
-        if self.progressive_passes > 50:
-            description_parts.append("progressive passer")
-        if self.progressive_carries > 30:
-            description_parts.append("ball carrier")
+        return _describe_styles_cached([tuple(getattr(self, field) for field in STYLE_DESCRIPTION_FIELDS)])[0]
+    
+    @classmethod
+    def generate_style_descriptions(cls, players):
+        """
+        Generate style descriptions for many players at once.
         
-        # Age and experience
-        if self.age < 23:
-            description_parts.append("young talent")
-        elif self.age > 30:
-            description_parts.append("experienced player")
+        Accepts a Player queryset (read with values_list) or an iterable of
+        Player instances.
+        """
+        if isinstance(players, models.QuerySet):
+            rows = list(players.values_list(*STYLE_DESCRIPTION_FIELDS))
+        else:
+            rows = [[getattr(player, field) for field in STYLE_DESCRIPTION_FIELDS] for player in players]
         
-        return " ".join(description_parts) if description_parts else "versatile player"
+        return _describe_styles(rows)
     
     def get_statistics_vector(self):
         """
         Create a numerical vector representation of player statistics for similarity search.
         """
-        # Normalize statistics to 0-1 range for better similarity comparison
-        stats = {
-            'goals_per_90': min(self.goals_per_90 / 1.0, 1.0) if self.goals_per_90 > 0 else 0,
-            'assists_per_90': min(self.assists_per_90 / 0.5, 1.0) if self.assists_per_90 > 0 else 0,
-            'shot_accuracy': self.shots_on_target_percentage / 100.0 if self.shots_on_target_percentage > 0 else 0,
-            'pass_accuracy': self.pass_completion_percentage / 100.0 if self.pass_completion_percentage > 0 else 0,
-            'dribble_success': self.dribble_success_percentage / 100.0 if self.dribble_success_percentage > 0 else 0,
-            'tackles_per_90': min((self.tackles / self.minutes_per_90) / 5.0, 1.0) if self.minutes_per_90 > 0 else 0,
-            'interceptions_per_90': min((self.interceptions / self.minutes_per_90) / 3.0, 1.0) if self.minutes_per_90 > 0 else 0,
-            'progressive_passes_per_90': min((self.progressive_passes / self.minutes_per_90) / 10.0, 1.0) if self.minutes_per_90 > 0 else 0,
-            'progressive_carries_per_90': min((self.progressive_carries / self.minutes_per_90) / 5.0, 1.0) if self.minutes_per_90 > 0 else 0,
-            'age_normalized': min(self.age / 40.0, 1.0),
-        }
+        return self.compute_statistics_matrix([self])[0]
+    
+    @classmethod
+    def compute_statistics_matrix(cls, players):
+        """
+        Compute statistics vectors for many players in one NumPy pass.
+        
+        Accepts a Player queryset (read with values_list) or an iterable of
+        Player instances and returns a float32 matrix with one row per player.
+        """
+        if isinstance(players, models.QuerySet):
+            rows = list(players.values_list(*STATISTICS_VECTOR_FIELDS))
+        else:
+            rows = [[getattr(player, field) for field in STATISTICS_VECTOR_FIELDS] for player in players]
+        
+        return _statistics_matrix(rows)
+    
+    @classmethod
+    def similarity_inputs(cls, queryset):
+        """
+        Load everything similarity search scores players on in a single query.
+        Returns (ids, positions, competitions, statistics matrix, style
+        descriptions) in queryset order.
+        """
+        rows = list(queryset.values_list(
+            'id', 'position', 'competition', 'style_embedding', *STYLE_DESCRIPTION_FIELDS
+        ))
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        positions = np.array([row[1] for row in rows], dtype=str)
+        competitions = np.array([row[2] for row in rows], dtype=str)
+        matrix = cls._embedding_matrix(ids, [row[3] for row in rows])
+        return ids, positions, competitions, matrix, _describe_styles_cached([row[4:] for row in rows])
+    
+    @classmethod
+    def _embedding_matrix(cls, ids, embeddings):
+        """
+        Stack stored style embeddings into a matrix, computing the vectors
+        of players without one from a single extra query.
+        """
+        matrix = np.zeros((len(ids), STATISTICS_VECTOR_SIZE), dtype=np.float32)
         
-        return list(stats.values())
+        stored = [index for index, embedding in enumerate(embeddings) if embedding is not None]
+        if stored:
+            packed = b''.join(embeddings[index] for index in stored)
+            matrix[stored] = np.frombuffer(packed, dtype=np.float32).reshape(len(stored), -1)
+        
+        missing = [index for index, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            stats = {
+                row[0]: row[1:]
+                for row in cls.objects.filter(id__in=ids[missing].tolist()).values_list('id', *STATISTICS_VECTOR_FIELDS)
+            }
+            matrix[missing] = _statistics_matrix([stats[ids[index]] for index in missing])
+        
+        return matrix
+    
+    @property
+    def style_vector(self):
+        """Decode the stored style embedding into a float32 array"""
+        if self.style_embedding is None:
+            return None
+        return np.frombuffer(self.style_embedding, dtype=np.float32)
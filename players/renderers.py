@@ -0,0 +1,34 @@
+"""
+Response renderers for the players API.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Render JSON with orjson instead of the standard library encoder.
+    
+    Output matches JSONRenderer's compact UTF-8 form. Dates, times,
+    dataclasses and other values orjson would format differently go through
+    DRF's encoder, as do indented responses. One difference remains: NaN
+    and infinite floats render as null, where JSONRenderer raises.
+    """
+    
+    options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        
+        # Escape the line separators JavaScript rejects in string literals,
+        # as JSONRenderer does
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,74 @@
+"""
+Text search over players.
+
+On PostgreSQL searches combine a GIN-indexed full-text match of word
+prefixes with pg_trgm similarity on name and squad, which tolerates
+typos, and rank results by that similarity. Other databases use
+case-insensitive substring matching of each word.
+"""
+
+import re
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import SearchQuery, SearchVector, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Q
+
+SEARCH_FIELDS = ('name', 'squad', 'nation', 'position')
+
+# Fields with a players_<field>_trgm index
+FUZZY_FIELDS = ('name', 'squad')
+
+# 'simple' neither stems nor drops stop words, which suits proper names
+SEARCH_CONFIG = 'simple'
+
+SEARCH_WORD = re.compile(r'[^\W_]+')
+
+
+def search_vector():
+    """Full-text vector over SEARCH_FIELDS, matching the players_search_idx expression."""
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+def substring_matches(query: str) -> Q:
+    """Every word of the query appears, case-insensitively, in one of SEARCH_FIELDS."""
+    matches = Q()
+    for term in query.split():
+        term_matches = Q()
+        for field in SEARCH_FIELDS:
+            term_matches |= Q(**{f'{field}__icontains': term})
+        matches &= term_matches
+    return matches
+
+
+def search_players(queryset, query: str, rank: bool = True):
+    """
+    Filter a Player queryset to rows matching a free-text query.
+    
+    With rank=True, PostgreSQL results are ordered by trigram similarity
+    ahead of the queryset's existing ordering.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(substring_matches(query))
+    
+    words = SEARCH_WORD.findall(query)
+    if words and ' '.join(words) == ' '.join(query.split()):
+        # Every word must start a word in one of the search fields
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        queryset = queryset.alias(search=search_vector())
+        matches = Q(search=SearchQuery(tsquery, search_type='raw', config=SEARCH_CONFIG))
+    else:
+        matches = substring_matches(query)
+    
+    # The % operator is what the trigram GIN indexes can serve
+    for field in FUZZY_FIELDS:
+        matches |= Q(TrigramSimilar(F(field), query))
+    queryset = queryset.filter(matches)
+    
+    if not rank:
+        return queryset
+    
+    # A name match outweighs a team match
+    similarity = TrigramSimilarity('name', query) + TrigramSimilarity('squad', query) * 0.5
+    return queryset.alias(similarity=similarity).order_by(
+        '-similarity', *queryset.query.order_by
+    )
@@ -46,10 +46,55 @@ class PlayerDetailSerializer(serializers.ModelSerializer):
     assists_per_90 = serializers.ReadOnlyField()
     goal_contribution_per_90 = serializers.ReadOnlyField()
     minutes_per_game = serializers.ReadOnlyField()
+    style_embedding = serializers.SerializerMethodField()
     
     class Meta:
         model = Player
-        fields = '__all__'
+        # Every field in model order except style_input_hash, which is
+        # bookkeeping for generate_embeddings
+        fields = [
+            'id', 'goals_per_90', 'assists_per_90', 'goal_contribution_per_90',
+            'minutes_per_game', 'rank', 'name', 'last_name', 'nation', 'position',
+            'squad', 'competition', 'age', 'born_year',
+            # Playing time
+            'matches_played', 'starts', 'minutes', 'minutes_per_90',
+            # Goals and assists
+            'goals', 'assists', 'goals_assists', 'goals_minus_penalties',
+            'penalties_scored', 'penalties_attempted',
+            # Cards
+            'yellow_cards', 'red_cards',
+            # Expected stats
+            'expected_goals', 'expected_goals_non_penalty', 'expected_assists',
+            # Shooting stats
+            'shots', 'shots_on_target', 'shots_on_target_percentage',
+            'shots_per_90', 'shots_on_target_per_90',
+            # Passing stats
+            'passes_completed', 'passes_attempted', 'pass_completion_percentage',
+            'key_passes',
+            # Defensive stats
+            'tackles', 'tackles_won', 'interceptions', 'blocks', 'clearances',
+            # Possession stats
+            'touches', 'dribbles_attempted', 'dribbles_successful',
+            'dribble_success_percentage',
+            # Goalkeeper stats
+            'goals_against', 'goals_against_per_90', 'shots_faced', 'saves',
+            'save_percentage', 'clean_sheets',
+            # Progression stats
+            'progressive_carries', 'progressive_passes', 'progressive_receptions',
+            # Style analysis
+            'style_embedding', 'style_description', 'similarity_score',
+            'created_at', 'updated_at'
+        ]
+    
+    def get_style_embedding(self, obj):
+        """
+        The stored float32 vector as plain floats. Rounding to 6 decimals
+        drops the float32 noise (0.44999998807907104 becomes 0.45).
+        """
+        vector = obj.style_vector
+        if vector is None:
+            return None
+        return [round(value, 6) for value in vector.tolist()]
 
 
 class PlayerStatsSerializer(serializers.ModelSerializer):
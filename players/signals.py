@@ -0,0 +1,26 @@
+"""
+Signal handlers keeping player caches in sync with the database.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .caching import LOOKUP_FIELDS, bump_data_version, clear_lookup_cache
+from .models import Player
+
+
+# Invalidation waits for the commit, so a request can't re-cache the old
+# rows under the new version while the write is still in flight
+@receiver(post_save, sender=Player)
+def invalidate_player_caches(sender, update_fields=None, **kwargs):
+    """Clear cached values and responses a saved player may have changed."""
+    transaction.on_commit(bump_data_version)
+    if update_fields is None or set(update_fields) & set(LOOKUP_FIELDS):
+        transaction.on_commit(clear_lookup_cache)
+
+
+@receiver(post_delete, sender=Player)
+def invalidate_deleted_player_caches(sender, **kwargs):
+    """Clear cached values and responses that may list a deleted player."""
+    transaction.on_commit(bump_data_version)
+    transaction.on_commit(clear_lookup_cache)
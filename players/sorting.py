@@ -3,19 +3,33 @@ Extensible sorting system for player statistics.
 Makes it easy to add new sort options without breaking existing functionality.
 """
 
-from django.db.models import F, Q, Case, When, Value, FloatField
+from types import MappingProxyType
+from django.db.models import Q
 from django.db.models.functions import Coalesce
 from typing import Dict, List, Tuple, Optional, Any
 
 
+def _build_order_bys(options) -> Dict[Tuple[str, bool], Tuple[str, ...]]:
+    """
+    Precompute the order_by() arguments for every sort option and direction,
+    keyed by (sort_key, reverse). The id breaks ties so pages stay stable.
+    """
+    return {
+        (key, reverse): (f"-{option['field']}" if reverse else option['field'], 'id')
+        for key, option in options.items()
+        for reverse in (False, True)
+    }
+
+
 class PlayerSortingManager:
     """
     Manages all available sorting options for players.
     Easy to extend with new sorting criteria.
     """
     
-    # Define all available sorting options with their display names and field mappings
-    SORT_OPTIONS = {
+    # Define all available sorting options with their display names and field mappings.
+    # Only add_sort_option/remove_sort_option modify this; readers use SORT_OPTIONS.
+    _SORT_OPTIONS = {
         # Basic info
         'name': {
             'display_name': 'Name (A-Z)',
@@ -199,6 +213,14 @@ class PlayerSortingManager:
 
     }
     
+    # Read-only view of the sort options
+    SORT_OPTIONS = MappingProxyType(_SORT_OPTIONS)
+    
+    # Category names in definition order and order_by() arguments per
+    # (sort_key, reverse), both kept in sync by add/remove_sort_option
+    _categories = tuple(dict.fromkeys(option['category'] for option in _SORT_OPTIONS.values()))
+    _order_bys = _build_order_bys(_SORT_OPTIONS)
+    
     @classmethod
     def get_sort_options(cls, category: Optional[str] = None) -> Dict[str, Dict]:
         """
@@ -215,7 +237,7 @@ class PlayerSortingManager:
                 key: value for key, value in cls.SORT_OPTIONS.items()
                 if value['category'] == category
             }
-        return cls.SORT_OPTIONS
+        return dict(cls.SORT_OPTIONS)
     
     @classmethod
     def get_categories(cls) -> List[str]:
@@ -225,7 +247,7 @@ class PlayerSortingManager:
         Returns:
             List of category names
         """
-        return list(set(option['category'] for option in cls.SORT_OPTIONS.values()))
+        return list(cls._categories)
     
     @classmethod
     def is_valid_sort_option(cls, sort_key: str) -> bool:
@@ -254,10 +276,11 @@ class PlayerSortingManager:
         Raises:
             ValueError: If sort_key is invalid
         """
-        if not cls.is_valid_sort_option(sort_key):
+        option = cls.SORT_OPTIONS.get(sort_key)
+        if option is None:
             raise ValueError(f"Invalid sort option: {sort_key}")
         
-        return cls.SORT_OPTIONS[sort_key]['field']
+        return option['field']
     
     @classmethod
     def apply_sorting(cls, queryset, sort_key: str, reverse: bool = False) -> Any:
@@ -275,84 +298,12 @@ class PlayerSortingManager:
         Raises:
             ValueError: If sort_key is invalid
         """
-        if not cls.is_valid_sort_option(sort_key):
+        # Per-90 and per-game rates are stored columns, so every option sorts directly
+        order_by = cls._order_bys.get((sort_key, bool(reverse)))
+        if order_by is None:
             raise ValueError(f"Invalid sort option: {sort_key}")
         
-        field = cls.get_sort_field(sort_key)
-        
-        # Handle special cases for calculated fields
-        if field in ['goals_per_90', 'assists_per_90', 'goal_contribution_per_90', 'minutes_per_game']:
-            # These are calculated properties, need special handling
-            return cls._apply_calculated_sort(queryset, field, reverse)
-        
-        # Standard field sorting
-        if reverse:
-            return queryset.order_by(f'-{field}')
-        else:
-            return queryset.order_by(field)
-    
-    @classmethod
-    def _apply_calculated_sort(cls, queryset, field: str, reverse: bool) -> Any:
-        """
-        Apply sorting for calculated fields that aren't in the database.
-        
-        Args:
-            queryset: Django queryset
-            field: Calculated field name
-            reverse: Whether to reverse sort order
-            
-        Returns:
-            Sorted queryset
-        """
-        # For calculated fields, we need to annotate them first
-        if field == 'goals_per_90':
-            queryset = queryset.annotate(
-                goals_per_90_calc=Case(
-                    When(minutes_per_90__gt=0, 
-                         then=F('goals') / F('minutes_per_90')),
-                    default=Value(0.0),
-                    output_field=FloatField()
-                )
-            )
-            sort_field = 'goals_per_90_calc'
-        elif field == 'assists_per_90':
-            queryset = queryset.annotate(
-                assists_per_90_calc=Case(
-                    When(minutes_per_90__gt=0, 
-                         then=F('assists') / F('minutes_per_90')),
-                    default=Value(0.0),
-                    output_field=FloatField()
-                )
-            )
-            sort_field = 'assists_per_90_calc'
-        elif field == 'goal_contribution_per_90':
-            queryset = queryset.annotate(
-                goal_contribution_per_90_calc=Case(
-                    When(minutes_per_90__gt=0, 
-                         then=F('goals_assists') / F('minutes_per_90')),
-                    default=Value(0.0),
-                    output_field=FloatField()
-                )
-            )
-            sort_field = 'goal_contribution_per_90_calc'
-        elif field == 'minutes_per_game':
-            queryset = queryset.annotate(
-                minutes_per_game_calc=Case(
-                    When(matches_played__gt=0, 
-                         then=F('minutes') / F('matches_played')),
-                    default=Value(0.0),
-                    output_field=FloatField()
-                )
-            )
-            sort_field = 'minutes_per_game_calc'
-        else:
-            # Fallback to original field
-            sort_field = field
-        
-        if reverse:
-            return queryset.order_by(f'-{sort_field}')
-        else:
-            return queryset.order_by(sort_field)
+        return queryset.order_by(*order_by)
     
     @classmethod
     def add_sort_option(cls, key: str, display_name: str, field: str, 
@@ -367,12 +318,13 @@ class PlayerSortingManager:
             description: Description of what this sorts by
             category: Category for grouping
         """
-        cls.SORT_OPTIONS[key] = {
+        cls._SORT_OPTIONS[key] = {
             'display_name': display_name,
             'field': field,
             'description': description,
             'category': category
         }
+        cls._refresh_derived()
     
     @classmethod
     def remove_sort_option(cls, key: str) -> bool:
@@ -385,10 +337,20 @@ class PlayerSortingManager:
         Returns:
             True if removed, False if not found
         """
-        if key in cls.SORT_OPTIONS:
-            del cls.SORT_OPTIONS[key]
+        if key in cls._SORT_OPTIONS:
+            del cls._SORT_OPTIONS[key]
+            cls._refresh_derived()
             return True
         return False
+    
+    @classmethod
+    def _refresh_derived(cls) -> None:
+        """
+        Rebuild the cached category names and order_by() arguments after
+        the sort options change.
+        """
+        cls._categories = tuple(dict.fromkeys(option['category'] for option in cls._SORT_OPTIONS.values()))
+        cls._order_bys = _build_order_bys(cls._SORT_OPTIONS)
 
 
 # Convenience functions for easy access
@@ -1,3 +1,631 @@
-from django.test import TestCase
+import os
+import tempfile
+from itertools import islice
+from unittest import mock
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from .management.commands.load_players import Command as LoadPlayersCommand
+from .models import Player
+from .vector_search import VectorSearchService, get_similarity_index
 
-# Create your tests here.
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'players-tests',
+    }
+}
+
+
+PLAYERS_CSV = os.path.join(settings.BASE_DIR, 'players_data-2024_2025.csv')
+
+
+def write_csv_head(rows):
+    """Write the header and first rows of the players CSV to a temporary file."""
+    with open(PLAYERS_CSV, encoding='utf-8') as source:
+        lines = list(islice(source, rows + 1))
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(handle, 'w', encoding='utf-8') as target:
+        target.writelines(lines)
+    return path
+
+
+def make_player(**overrides):
+    """Create a player with plausible statistics, overridable per field."""
+    values = {
+        'name': 'Test Player',
+        'last_name': 'Player',
+        'nation': 'ENG',
+        'position': 'FW',
+        'squad': 'Arsenal',
+        'competition': 'Premier League',
+        'age': 25.0,
+        'born_year': 2000,
+        'matches_played': 30,
+        'starts': 28,
+        'minutes': 2520,
+        'minutes_per_90': 28.0,
+        'goals': 12,
+        'assists': 6,
+        'goals_assists': 18,
+    }
+    values.update(overrides)
+    return Player.objects.create(**values)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PlayerTestCase(TestCase):
+    """
+    Base test case running against an in-memory cache.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+
+class GenerateEmbeddingsTests(PlayerTestCase):
+    """
+    Tests for the generate_embeddings management command.
+    """
+
+    def run_command(self, *args):
+        call_command('generate_embeddings', *args, stdout=StringIO())
+
+    def test_bulk_run_embeds_new_players(self):
+        player = make_player()
+        self.run_command()
+
+        player.refresh_from_db()
+        self.assertTrue(player.style_description)
+        self.assertEqual(player.style_input_hash, player.get_style_input_hash())
+        self.assertIsNotNone(player.style_vector)
+
+    def test_bulk_run_regenerates_players_whose_statistics_changed(self):
+        player = make_player()
+        self.run_command()
+        player.refresh_from_db()
+        old_hash, old_vector = player.style_input_hash, player.style_vector.copy()
+
+        player.goals = 40
+        player.save()
+        self.run_command()
+
+        player.refresh_from_db()
+        self.assertNotEqual(player.style_input_hash, old_hash)
+        self.assertEqual(player.style_input_hash, player.get_style_input_hash())
+        self.assertFalse((player.style_vector == old_vector).all())
+
+    def test_bulk_run_skips_unchanged_players(self):
+        make_player()
+        self.run_command()
+
+        out = StringIO()
+        call_command('generate_embeddings', stdout=out)
+
+        self.assertIn('generated embeddings for 0 players', out.getvalue())
+
+    def test_saving_statistics_marks_embedding_stale(self):
+        player = make_player()
+        self.run_command()
+        player.refresh_from_db()
+
+        player.goals = 40
+        player.save(update_fields=['goals'])
+        player.refresh_from_db()
+        self.assertIsNone(player.style_input_hash)
+
+        out = StringIO()
+        call_command('generate_embeddings', '--exact-count', stdout=out)
+
+        self.assertIn('Found 1 players to process', out.getvalue())
+        self.assertIn('generated embeddings for 1 players', out.getvalue())
+
+
+class ORJSONRendererTests(PlayerTestCase):
+    """
+    Tests that ORJSONRenderer output matches DRF's JSONRenderer.
+    """
+
+    def test_matches_json_renderer(self):
+        from datetime import date, datetime, timezone
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer
+
+        data = {
+            'name': 'Kylian Mbappé \u2028',
+            'age': 25.5,
+            'goals': [1, 2, None],
+            'updated_at': datetime(2025, 7, 21, 14, 36, 46, 123456, tzinfo=timezone.utc),
+            'born': date(1998, 12, 20),
+            'rating': Decimal('7.25'),
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_nan_renders_as_null(self):
+        from .renderers import ORJSONRenderer
+
+        self.assertEqual(ORJSONRenderer().render({'value': float('nan')}), b'{"value":null}')
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:1/0',
+    }
+})
+class CacheUnavailableTests(TestCase):
+    """
+    Tests that an unreachable cache backend never fails requests or writes.
+    """
+
+    def setUp(self):
+        self.player = make_player()
+
+    def test_endpoints_fall_through_to_the_database(self):
+        with self.assertLogs('players.caching', level='WARNING'):
+            for url in (
+                '/api/players/positions/',
+                '/api/players/leaderboard/?stat=goals',
+                f'/api/players/{self.player.pk}/similar/',
+            ):
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+
+    def test_save_and_delete_still_succeed(self):
+        with self.assertLogs('players.caching', level='WARNING'), self.captureOnCommitCallbacks(execute=True):
+            self.player.goals = 20
+            self.player.save()
+        self.assertEqual(Player.objects.get(pk=self.player.pk).goals, 20)
+
+        with self.assertLogs('players.caching', level='WARNING'), self.captureOnCommitCallbacks(execute=True):
+            self.player.delete()
+        self.assertFalse(Player.objects.exists())
+
+    def test_similarity_index_is_reused_while_cache_is_down(self):
+        with self.assertLogs('players.caching', level='WARNING'):
+            index = get_similarity_index()
+            self.assertIs(get_similarity_index(), index)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                make_player(name='New Player')
+
+            self.assertIsNot(get_similarity_index(), index)
+
+
+class PlayerDetailTests(PlayerTestCase):
+    """
+    Tests for the player detail response.
+    """
+
+    def test_detail_keeps_field_order_without_input_hash(self):
+        player = make_player()
+        call_command('generate_embeddings', stdout=StringIO())
+
+        data = self.client.get(f'/api/players/{player.pk}/').json()
+
+        keys = list(data)
+        self.assertNotIn('style_input_hash', keys)
+        self.assertEqual(keys[:6], ['id', 'goals_per_90', 'assists_per_90', 'goal_contribution_per_90', 'minutes_per_game', 'rank'])
+        self.assertEqual(keys[keys.index('progressive_receptions') + 1], 'style_embedding')
+        self.assertTrue(all(value == round(value, 6) for value in data['style_embedding']))
+
+
+class ColumnSelectionTests(PlayerTestCase):
+    """
+    Tests that list-style actions only select the columns they serialize.
+    """
+
+    UNSERIALIZED_COLUMNS = ('style_embedding', 'style_description', 'style_input_hash', 'created_at', 'updated_at')
+
+    def setUp(self):
+        super().setUp()
+        self.player = make_player(name='Harry Kane')
+        call_command('generate_embeddings', stdout=StringIO())
+
+    def selected_columns(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+        return [query['sql'].split(' FROM ')[0] for query in queries]
+
+    def test_projected_actions_skip_unserialized_columns(self):
+        for url in (
+            '/api/players/',
+            '/api/players/search/?q=Kane',
+            '/api/players/leaderboard/?stat=goals',
+            f'/api/players/{self.player.pk}/stats/',
+        ):
+            for select in self.selected_columns(url):
+                for column in self.UNSERIALIZED_COLUMNS:
+                    with self.subTest(url=url, column=column):
+                        self.assertNotIn(f'"{column}"', select)
+
+    def test_projected_actions_run_no_deferred_loads(self):
+        with self.assertNumQueries(2):
+            self.client.get('/api/players/')
+        with self.assertNumQueries(1):
+            self.client.get(f'/api/players/{self.player.pk}/stats/')
+
+    def test_detail_selects_every_column(self):
+        select, = self.selected_columns(f'/api/players/{self.player.pk}/')
+
+        self.assertIn('"style_embedding"', select)
+
+
+class PlayerAdminTests(PlayerTestCase):
+    """
+    Tests for the Player admin.
+    """
+
+    def setUp(self):
+        super().setUp()
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.player = make_player()
+
+    def test_changelist_selects_displayed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/players/player/')
+
+        self.assertContains(response, 'Test Player')
+        selects = [query['sql'] for query in queries if 'FROM "players"' in query['sql'] and 'COUNT' not in query['sql']]
+        self.assertTrue(selects)
+        for select in selects:
+            self.assertNotIn('"style_description"', select)
+
+    def test_change_form_loads_every_field(self):
+        response = self.client.get(f'/admin/players/player/{self.player.pk}/change/')
+
+        self.assertContains(response, 'name="born_year"')
+
+
+class PlayerFilterTests(PlayerTestCase):
+    """
+    Tests for the list endpoint's filter parameters.
+    """
+
+    def setUp(self):
+        super().setUp()
+        make_player(name='Harry Kane', squad='Bayern Munich', goals=30)
+        make_player(name='Bukayo Saka', squad='Arsenal', goals=10)
+
+    def names(self, url):
+        return sorted(player['name'] for player in self.client.get(url).json()['results'])
+
+    def test_declared_filters(self):
+        self.assertEqual(self.names('/api/players/?goals_min=20'), ['Harry Kane'])
+        self.assertEqual(self.names('/api/players/?team=arsenal'), ['Bukayo Saka'])
+
+    def test_lookup_filters(self):
+        self.assertEqual(self.names('/api/players/?goals__gte=20'), ['Harry Kane'])
+        self.assertEqual(self.names('/api/players/?goals__lte=20'), ['Bukayo Saka'])
+        self.assertEqual(self.names('/api/players/?squad__icontains=bayern'), ['Harry Kane'])
+        self.assertEqual(self.names('/api/players/?minutes__gte=3000'), [])
+
+
+class ResponseCacheTests(PlayerTestCase):
+    """
+    Tests that cached responses are retired when player data changes.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.striker = make_player(name='Harry Kane', goals=30)
+        self.winger = make_player(name='Bukayo Saka', goals=10)
+
+    def leaderboard_names(self):
+        response = self.client.get('/api/players/leaderboard/?stat=goals&limit=5')
+        return [player['name'] for player in response.json()['players']]
+
+    def test_leaderboard_is_served_from_cache(self):
+        self.leaderboard_names()
+        with self.assertNumQueries(0):
+            self.leaderboard_names()
+
+    def test_leaderboard_cache_ignores_unknown_params(self):
+        self.client.get('/api/players/leaderboard/?stat=goals&squad=Arsenal')
+        with self.assertNumQueries(0):
+            self.client.get('/api/players/leaderboard/?stat=goals&squad=Arsenal&junk=1')
+
+        with self.assertNumQueries(1):
+            self.client.get('/api/players/leaderboard/?stat=goals&squad=Chelsea')
+
+    def test_save_invalidates_cached_leaderboard(self):
+        self.assertEqual(self.leaderboard_names(), ['Harry Kane', 'Bukayo Saka'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.winger.goals = 40
+            self.winger.save()
+
+        self.assertEqual(self.leaderboard_names(), ['Bukayo Saka', 'Harry Kane'])
+
+    def test_delete_invalidates_cached_leaderboard(self):
+        self.leaderboard_names()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.winger.delete()
+
+        self.assertEqual(self.leaderboard_names(), ['Harry Kane'])
+
+    def test_save_invalidates_cached_similar_players(self):
+        twin = make_player(name='Dominic Solanke', goals=30)
+        url = f'/api/players/{self.striker.pk}/similar/?method=nlp'
+
+        def similar_names():
+            return [player['name'] for player in self.client.get(url).json()['similar_players']]
+
+        self.assertIn('Dominic Solanke', similar_names())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            twin.name = 'Ollie Watkins'
+            twin.save()
+
+        self.assertIn('Ollie Watkins', similar_names())
+
+
+class OrderingTests(PlayerTestCase):
+    """
+    Tests that list orderings are total, so pages never overlap.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.players = [make_player(name=f'Player {index}', goals=5, assists=2) for index in range(5)]
+        self.expected = [player.pk for player in self.players]
+
+    def ids(self, url):
+        return [player['id'] for player in self.client.get(url).json()['results']]
+
+    def test_default_order_breaks_ties_by_id(self):
+        self.assertEqual(self.ids('/api/players/'), self.expected)
+
+    def test_sort_options_break_ties_by_id(self):
+        for order in ('desc', 'asc'):
+            self.assertEqual(self.ids(f'/api/players/?sort_by=goals_per_90&sort_order={order}'), self.expected)
+
+
+class LoadPlayersMixin:
+    """
+    Loads the head of the players CSV with the load_players command.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.csv_file = write_csv_head(40)
+        self.addCleanup(os.remove, self.csv_file)
+
+    def load(self, *args):
+        out = StringIO()
+        call_command('load_players', self.csv_file, '--clear', *args, stdout=out)
+        return out.getvalue()
+
+    def loaded_rows(self):
+        fields = [
+            field.name for field in Player._meta.concrete_fields
+            if field.name not in ('id', 'created_at', 'updated_at')
+        ]
+        return list(Player.objects.order_by('id').values(*fields))
+
+
+class LoadPlayersTests(LoadPlayersMixin, PlayerTestCase):
+    """
+    Tests for the load_players management command.
+    """
+
+    # Values the original row-by-row parser loaded for these CSV rows, by position
+    BASELINE_ROWS = {
+        0: {'name': 'Max Aarons', 'last_name': 'aarons', 'nation': 'eng ENG', 'position': 'DF', 'squad': 'Bournemouth', 'competition': 'eng Premier League', 'age': 24.0, 'born_year': 2000, 'matches_played': 3, 'minutes': 86, 'minutes_per_90': 1.0, 'goals': 0, 'assists': 0, 'goals_assists': 0, 'expected_goals': 0.0, 'shots_on_target_percentage': 0.0, 'pass_completion_percentage': 79.4, 'dribble_success_percentage': 0.0, 'goals_against': None, 'save_percentage': None, 'clean_sheets': None, 'progressive_passes': 8},
+        5: {'name': 'Yunis Abdelhamid', 'last_name': 'abdelhamid', 'nation': 'ma MAR', 'position': 'DF', 'squad': 'Saint-Étienne', 'competition': 'fr Ligue 1', 'age': 36.0, 'born_year': 1987, 'matches_played': 16, 'minutes': 1033, 'minutes_per_90': 11.5, 'goals': 0, 'assists': 0, 'goals_assists': 0, 'expected_goals': 0.2, 'shots_on_target_percentage': 50.0, 'pass_completion_percentage': 86.7, 'dribble_success_percentage': 42.9, 'goals_against': None, 'save_percentage': None, 'clean_sheets': None, 'progressive_passes': 22},
+        33: {'name': 'Adrián', 'last_name': 'adrian', 'nation': 'es ESP', 'position': 'GK', 'squad': 'Betis', 'competition': 'es La Liga', 'age': 37.0, 'born_year': 1987, 'matches_played': 19, 'minutes': 1710, 'minutes_per_90': 19.0, 'goals': 0, 'assists': 0, 'goals_assists': 0, 'expected_goals': 0.0, 'shots_on_target_percentage': 0.0, 'pass_completion_percentage': 76.6, 'dribble_success_percentage': 0.0, 'goals_against': 27.0, 'save_percentage': 65.8, 'clean_sheets': 3, 'progressive_passes': 0},
+    }
+
+    def test_loaded_rows_match_baseline_parser(self):
+        self.load('--jobs', '1')
+
+        self.assertEqual(Player.objects.count(), 40)
+        loaded = self.loaded_rows()
+        for row, expected in self.BASELINE_ROWS.items():
+            with self.subTest(row=row):
+                self.assertEqual({field: loaded[row][field] for field in expected}, expected)
+
+    def test_load_inside_transaction_parses_in_process(self):
+        with transaction.atomic():
+            out = self.load('--jobs', '2', '--batch-size', '7')
+
+            self.assertIn('parsing batches in this process', out)
+            self.assertEqual(Player.objects.count(), 40)
+
+    def test_clear_replaces_existing_players(self):
+        make_player(name='Stale Player')
+        self.load('--jobs', '1')
+
+        self.assertEqual(Player.objects.count(), 40)
+        self.assertFalse(Player.objects.filter(name='Stale Player').exists())
+
+    def test_failed_load_keeps_cleared_players(self):
+        make_player(name='Stale Player')
+
+        with mock.patch.object(LoadPlayersCommand, 'process_batch', side_effect=RuntimeError('boom')):
+            with self.assertRaises(CommandError):
+                self.load('--jobs', '1')
+
+        self.assertEqual(list(Player.objects.values_list('name', flat=True)), ['Stale Player'])
+
+    def test_rejects_counts_below_one(self):
+        for option in ('--batch-size', '--commit-every', '--jobs'):
+            for value in ('0', '-1'):
+                with self.subTest(option=option, value=value):
+                    with self.assertRaisesMessage(CommandError, f'{option} must be at least 1'):
+                        self.load(option, value)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LoadPlayersPoolTests(LoadPlayersMixin, TransactionTestCase):
+    """
+    Tests for load_players' worker pool, which only runs outside a transaction.
+    """
+
+    def test_worker_pool_and_commit_groups_load_the_same_rows(self):
+        self.load('--jobs', '1')
+        single_pass = self.loaded_rows()
+
+        out = self.load('--jobs', '2', '--batch-size', '7', '--commit-every', '2')
+
+        self.assertNotIn('parsing batches in this process', out)
+        self.assertEqual(self.loaded_rows(), single_pass)
+
+
+class RateFieldTests(PlayerTestCase):
+    """
+    Tests for the stored per-90 and per-game rate columns.
+    """
+
+    def test_rates_are_computed_on_create(self):
+        player = make_player(goals=12, assists=6, goals_assists=18, minutes_per_90=28.0, minutes=2520, matches_played=30)
+
+        player.refresh_from_db()
+        self.assertEqual(player.goals_per_90, 0.43)
+        self.assertEqual(player.assists_per_90, 0.21)
+        self.assertEqual(player.goal_contribution_per_90, 0.64)
+        self.assertEqual(player.minutes_per_game, 84.0)
+
+    def test_rates_update_on_save(self):
+        player = make_player()
+        player.goals = 28
+        player.save()
+
+        player.refresh_from_db()
+        self.assertEqual(player.goals_per_90, 1.0)
+
+    def test_rates_update_when_saving_source_fields_only(self):
+        player = make_player()
+        player.goals = 28
+        player.save(update_fields=['goals'])
+
+        player.refresh_from_db()
+        self.assertEqual(player.goals_per_90, 1.0)
+
+    def test_rates_are_zero_without_playing_time(self):
+        player = make_player(minutes_per_90=0.0, matches_played=0, minutes=0)
+
+        player.refresh_from_db()
+        self.assertEqual(player.goals_per_90, 0.0)
+        self.assertEqual(player.minutes_per_game, 0.0)
+
+
+class RateFieldMigrationTests(TransactionTestCase):
+    """
+    Tests that migration 0007 backfills the rate columns of existing players.
+    """
+
+    migrate_from = [('players', '0006_player_admin_sort_idx')]
+    migrate_to = [('players', '0007_player_rate_fields')]
+
+    def tearDown(self):
+        # Leave the schema fully migrated for the tests that follow
+        call_command('migrate', 'players', verbosity=0)
+
+    def test_backfills_rates(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        OldPlayer = executor.loader.project_state(self.migrate_from).apps.get_model('players', 'Player')
+        player = OldPlayer.objects.create(
+            name='Test Player', nation='ENG', position='FW', squad='Arsenal',
+            competition='Premier League', age=25.0, born_year=2000,
+            matches_played=30, minutes=2520, minutes_per_90=28.0,
+            goals=12, assists=6, goals_assists=18,
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        NewPlayer = executor.loader.project_state(self.migrate_to).apps.get_model('players', 'Player')
+
+        migrated = NewPlayer.objects.get(pk=player.pk)
+        self.assertEqual(migrated.goals_per_90, 0.43)
+        self.assertEqual(migrated.goal_contribution_per_90, 0.64)
+        self.assertEqual(migrated.minutes_per_game, 84.0)
+
+
+class SearchTests(PlayerTestCase):
+    """
+    Tests for the search action and ?search= filtering.
+    """
+
+    def setUp(self):
+        super().setUp()
+        make_player(name='Harry Kane', squad='Bayern Munich', competition='Bundesliga')
+        make_player(name='Harry Maguire', squad='Manchester Utd', position='DF')
+        make_player(name='Kane Smith', squad='Arsenal', nation='SCO')
+
+    def names(self, url):
+        return sorted(player['name'] for player in self.client.get(url).json()['results'])
+
+    def test_search_matches_every_word(self):
+        self.assertEqual(self.names('/api/players/search/?q=Harry Kane'), ['Harry Kane'])
+        self.assertEqual(self.names('/api/players/search/?q=harry'), ['Harry Kane', 'Harry Maguire'])
+
+    def test_search_matches_words_across_fields(self):
+        self.assertEqual(self.names('/api/players/search/?q=Kane Arsenal'), ['Kane Smith'])
+        self.assertEqual(self.names('/api/players/search/?q=Harry DF'), ['Harry Maguire'])
+
+    def test_search_excludes_rows_missing_a_word(self):
+        self.assertEqual(self.names('/api/players/search/?q=Harry Arsenal'), [])
+
+    def test_search_requires_query(self):
+        self.assertEqual(self.client.get('/api/players/search/').status_code, 400)
+
+    def test_search_filter_uses_same_matching(self):
+        for query in ('Harry Kane', 'Kane Arsenal', 'Harry Arsenal', 'harry'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.names(f'/api/players/?search={query}'),
+                    self.names(f'/api/players/search/?q={query}'),
+                )
+
+
+class SimilarityIndexTests(PlayerTestCase):
+    """
+    Tests for the in-memory similarity index.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.striker = make_player(name='Harry Kane', goals=30)
+        self.twin = make_player(name='Dominic Solanke', goals=30)
+        self.service = VectorSearchService()
+
+    def similar_names(self):
+        return [player.name for player in self.service.find_similar_players(self.striker, method='statistical')]
+
+    def test_index_is_reused_until_data_changes(self):
+        index = get_similarity_index()
+
+        self.assertIs(get_similarity_index(), index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.twin.save()
+
+        self.assertIsNot(get_similarity_index(), index)
+
+    def test_index_includes_new_players(self):
+        self.assertEqual(self.similar_names(), ['Dominic Solanke'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_player(name='Ollie Watkins', goals=30)
+
+        self.assertEqual(self.similar_names(), ['Dominic Solanke', 'Ollie Watkins'])
+
+    def test_players_deleted_since_build_are_skipped(self):
+        self.assertEqual(self.similar_names(), ['Dominic Solanke'])
+
+        # Without the commit callbacks the index is not rebuilt
+        twin_id = self.twin.pk
+        self.twin.delete()
+
+        self.assertIn(twin_id, get_similarity_index().ids)
+        self.assertEqual(self.similar_names(), [])
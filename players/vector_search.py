@@ -4,14 +4,56 @@ Combines statistical similarity with NLP-based style analysis.
 """
 
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, NamedTuple, Tuple, Optional
+from django.db import transaction
 from django.db.models import Q
 from django.conf import settings
-from .models import Player
+from .caching import bump_data_version, data_version
+from .models import Player, STYLE_INPUT_FIELDS
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Style data is only used for scoring; returned players are listed without it
+RESULT_DEFERRED_FIELDS = ('style_description', 'style_embedding', 'style_input_hash')
+
+
+class SimilarityIndex(NamedTuple):
+    """
+    Every player's similarity inputs as parallel arrays, one row per player.
+    """
+    ids: np.ndarray
+    positions: np.ndarray
+    competitions: np.ndarray
+    vectors: np.ndarray
+    vector_norms: np.ndarray
+    descriptions: List[str]
+
+
+@lru_cache(maxsize=1)
+def _build_similarity_index(version: int) -> SimilarityIndex:
+    """Load the similarity index for one version of the player data."""
+    # Rows keep the default ordering, which decides between tied scores;
+    # the id settles players that share a name and goal record
+    ids, positions, competitions, vectors, descriptions = Player.similarity_inputs(
+        Player.objects.order_by(*Player._meta.ordering, 'id')
+    )
+    return SimilarityIndex(
+        ids, positions, competitions, vectors, np.linalg.norm(vectors, axis=1), descriptions
+    )
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """
+    Similarity index for the current player data.
+    
+    Each process keeps the latest index in memory and rebuilds it once the
+    data version changes, so requests no longer read the table.
+    """
+    return _build_similarity_index(data_version())
+
 
 class VectorSearchService:
     """
@@ -50,28 +92,7 @@ class VectorSearchService:
         Find similar players based on statistical vectors.
         """
         try:
-            player_vector = player.get_statistics_vector()
-            
-            # Get all players with similar position and competition
-            similar_players = Player.objects.filter(
-                position=player.position,
-                competition=player.competition
-            ).exclude(id=player.id)
-            
-            # Calculate similarities
-            similarities = []
-            for other_player in similar_players:
-                other_vector = other_player.get_statistics_vector()
-                similarity = self._cosine_similarity(player_vector, other_vector)
-                
-                if similarity >= self.similarity_threshold:
-                    other_player.similarity_score = similarity
-                    similarities.append((other_player, similarity))
-            
-            # Sort by similarity and return top results
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return [player for player, _ in similarities[:limit]]
-            
+            return self._load_ranked_players(*self._rank_statistical(player, limit))
         except Exception as e:
             logger.error(f"Error in statistical similarity search: {e}")
             return self._fallback_similarity_search(player, limit)
@@ -81,28 +102,7 @@ class VectorSearchService:
         Find similar players based on NLP style descriptions.
         """
         try:
-            # Generate style description for the target player
-            target_description = player.generate_style_description()
-            
-            # Get players with similar positions
-            similar_players = Player.objects.filter(
-                position=player.position
-            ).exclude(id=player.id)
-            
-            # Calculate text-based similarities
-            similarities = []
-            for other_player in similar_players:
-                other_description = other_player.generate_style_description()
-                similarity = self._text_similarity(target_description, other_description)
-                
-                if similarity >= self.similarity_threshold:
-                    other_player.similarity_score = similarity
-                    similarities.append((other_player, similarity))
-            
-            # Sort by similarity and return top results
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return [player for player, _ in similarities[:limit]]
-            
+            return self._load_ranked_players(*self._rank_nlp(player, limit))
         except Exception as e:
             logger.error(f"Error in NLP similarity search: {e}")
             return self._fallback_similarity_search(player, limit)
@@ -112,90 +112,167 @@ class VectorSearchService:
         Find similar players using both statistical and NLP methods.
         """
         try:
-            # Get both types of similarities
-            statistical_similar = self._find_statistical_similarities(player, limit * 2)
-            nlp_similar = self._find_nlp_similarities(player, limit * 2)
+            # Score both dimensions on the position's candidates
+            index = get_similarity_index()
+            candidates = self._candidates(index, player)
             
-            # Combine and rank
-            all_similar = {}
+            # Statistical similarity only compares players within the same competition
+            same_competition = candidates[index.competitions[candidates] == player.competition]
+            statistical_ids, statistical_scores = self._rank(
+                index.ids[same_competition],
+                self._cosine_similarities(index, same_competition, player.get_statistics_vector()),
+                limit * 2
+            )
+            nlp_ids, nlp_scores = self._rank(
+                index.ids[candidates],
+                self._text_similarities(
+                    player.generate_style_description(),
+                    [index.descriptions[row] for row in candidates]
+                ),
+                limit * 2
+            )
             
-            # Add statistical similarities
-            for p in statistical_similar:
-                all_similar[p.id] = {
-                    'player': p,
-                    'statistical_score': p.similarity_score,
-                    'nlp_score': 0.0
-                }
+            # Align both score arrays on one id array, statistical matches first
+            matched_ids = np.concatenate([statistical_ids, nlp_ids[~np.isin(nlp_ids, statistical_ids)]])
+            id_order = np.argsort(matched_ids)
+            nlp_positions = id_order[np.searchsorted(matched_ids, nlp_ids, sorter=id_order)]
             
-            # Add NLP similarities
-            for p in nlp_similar:
-                if p.id in all_similar:
-                    all_similar[p.id]['nlp_score'] = p.similarity_score
-                else:
-                    all_similar[p.id] = {
-                        'player': p,
-                        'statistical_score': 0.0,
-                        'nlp_score': p.similarity_score
-                    }
+            combined_statistical = np.zeros(len(matched_ids))
+            combined_statistical[:len(statistical_ids)] = statistical_scores
+            combined_nlp = np.zeros(len(matched_ids))
+            combined_nlp[nlp_positions] = nlp_scores
             
             # Calculate hybrid scores (weighted average)
-            hybrid_scores = []
-            for player_id, data in all_similar.items():
-                hybrid_score = (data['statistical_score'] * 0.6 + data['nlp_score'] * 0.4)
-                data['player'].similarity_score = hybrid_score
-                hybrid_scores.append((data['player'], hybrid_score))
-            
-            # Sort by hybrid score and return top results
-            hybrid_scores.sort(key=lambda x: x[1], reverse=True)
-            return [player for player, _ in hybrid_scores[:limit]]
+            hybrid_scores = combined_statistical * 0.6 + combined_nlp * 0.4
+            return self._load_ranked_players(*self._top_k(matched_ids, hybrid_scores, limit))
             
         except Exception as e:
             logger.error(f"Error in hybrid similarity search: {e}")
             return self._fallback_similarity_search(player, limit)
     
-    def _cosine_similarity(self, vector1: List[float], vector2: List[float]) -> float:
+    def _rank_statistical(self, player: Player, limit: int) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate cosine similarity between two vectors.
+        Rank candidates by statistical similarity.
+        Returns the ids and scores of the best matches, best first.
         """
-        try:
-            v1 = np.array(vector1)
-            v2 = np.array(vector2)
-            
-            # Handle zero vectors
-            if np.all(v1 == 0) or np.all(v2 == 0):
-                return 0.0
-            
-            dot_product = np.dot(v1, v2)
-            norm1 = np.linalg.norm(v1)
-            norm2 = np.linalg.norm(v2)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            return dot_product / (norm1 * norm2)
-        except Exception as e:
-            logger.error(f"Error calculating cosine similarity: {e}")
-            return 0.0
+        # Compare against players with the same position and competition
+        index = get_similarity_index()
+        candidates = self._candidates(index, player)
+        candidates = candidates[index.competitions[candidates] == player.competition]
+        
+        scores = self._cosine_similarities(index, candidates, player.get_statistics_vector())
+        return self._rank(index.ids[candidates], scores, limit)
     
-    def _text_similarity(self, text1: str, text2: str) -> float:
+    def _rank_nlp(self, player: Player, limit: int) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate similarity between two text descriptions.
-        Simple word overlap similarity for now.
+        Rank candidates by style description similarity.
+        Returns the ids and scores of the best matches, best first.
         """
-        try:
-            words1 = set(text1.lower().split())
-            words2 = set(text2.lower().split())
-            
-            if not words1 or not words2:
-                return 0.0
-            
-            intersection = words1.intersection(words2)
-            union = words1.union(words2)
-            
-            return len(intersection) / len(union)
-        except Exception as e:
-            logger.error(f"Error calculating text similarity: {e}")
-            return 0.0
+        # Generate style description for the target player
+        target_description = player.generate_style_description()
+        
+        # Compare against players with the same position
+        index = get_similarity_index()
+        candidates = self._candidates(index, player)
+        
+        # Calculate text-based similarities against all candidates at once
+        scores = self._text_similarities(target_description, [index.descriptions[row] for row in candidates])
+        return self._rank(index.ids[candidates], scores, limit)
+    
+    def _candidates(self, index: SimilarityIndex, player: Player) -> np.ndarray:
+        """
+        Index rows of the other players sharing the player's position.
+        """
+        return np.flatnonzero((index.positions == player.position) & (index.ids != player.id))
+    
+    def _rank(self, ids: np.ndarray, scores: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Keep candidates scoring at least the similarity threshold and
+        return the ids and scores of the best ones, best first.
+        """
+        matches = np.flatnonzero(scores >= self.similarity_threshold)
+        
+        # Return top results without sorting every candidate
+        return self._top_k(ids[matches], scores[matches], limit)
+    
+    def _top_k(self, ids: np.ndarray, scores: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the ids and scores of the highest scores, best first.
+        
+        Uses a linear-time partition so only the selected scores get sorted;
+        equal scores keep their candidate order.
+        """
+        if limit <= 0:
+            return ids[:0], scores[:0]
+        
+        if len(scores) > limit:
+            # Score of the limit-th best candidate
+            cutoff = -np.partition(-scores, limit - 1)[limit - 1]
+            above = np.flatnonzero(scores > cutoff)
+            tied = np.flatnonzero(scores == cutoff)[:limit - len(above)]
+            top = np.concatenate([above, tied])
+        else:
+            top = np.arange(len(scores))
+        
+        top = top[np.lexsort((top, -scores[top]))]
+        return ids[top], scores[top]
+    
+    def _load_ranked_players(self, ids: np.ndarray, scores: np.ndarray) -> List[Player]:
+        """
+        Fetch the players for ranked ids in one query,
+        keeping the ranking order and attaching each score.
+        """
+        players = Player.objects.defer(*RESULT_DEFERRED_FIELDS).in_bulk(ids.tolist())
+        
+        results = []
+        for player_id, similarity in zip(ids.tolist(), scores.tolist()):
+            # Players deleted since the index was built are skipped
+            other_player = players.get(player_id)
+            if other_player is None:
+                continue
+            other_player.similarity_score = similarity
+            results.append(other_player)
+        return results
+    
+    def _cosine_similarities(self, index: SimilarityIndex, rows: np.ndarray,
+                             vector: np.ndarray) -> np.ndarray:
+        """
+        Calculate cosine similarity between a vector and the given index rows.
+        Zero vectors get a similarity of 0.0.
+        """
+        vector_norm = np.linalg.norm(vector)
+        if vector_norm == 0:
+            # Nothing is similar to an all-zero profile; skip the matrix work
+            return np.zeros(len(rows), dtype=index.vectors.dtype)
+        
+        norms = index.vector_norms[rows] * vector_norm
+        return (index.vectors[rows] @ vector) / np.maximum(norms, 1e-12)
+    
+    def _text_similarities(self, text: str, texts: List[str]) -> np.ndarray:
+        """
+        Calculate word overlap similarity between a text description and many others.
+        
+        Each word is assigned a bit, so an overlap is an AND/OR of two integers
+        and a popcount. Descriptions repeat heavily, so each distinct one is
+        only scored once.
+        """
+        word_bits = {}
+        
+        def word_mask(value: str) -> int:
+            mask = 0
+            for word in value.lower().split():
+                mask |= 1 << word_bits.setdefault(word, len(word_bits))
+            return mask
+        
+        target = word_mask(text)
+        distinct = dict.fromkeys(texts, 0.0)
+        if target:
+            for other in distinct:
+                mask = word_mask(other)
+                if mask:
+                    distinct[other] = (target & mask).bit_count() / (target | mask).bit_count()
+        
+        return np.array([distinct[other] for other in texts], dtype=np.float64)
     
     def _fallback_similarity_search(self, player: Player, limit: int) -> List[Player]:
         """
@@ -203,7 +280,7 @@ class VectorSearchService:
         """
         try:
             # Simple similarity based on position, age range, and performance
-            similar_players = Player.objects.filter(
+            similar_players = Player.objects.defer(*RESULT_DEFERRED_FIELDS).filter(
                 position=player.position,
                 age__range=[player.age - 3, player.age + 3],
                 competition=player.competition
@@ -227,23 +304,30 @@ class VectorSearchService:
         This would be used in a background task.
         """
         try:
-            players = Player.objects.all()
+            # Stream players, loading only the fields the embedding is built from
+            players = Player.objects.only('id', *STYLE_INPUT_FIELDS).order_by('id').iterator(chunk_size=1000)
             updated_count = 0
             
-            for player in players:
-                # Generate style description
-                style_description = player.generate_style_description()
+            while batch := list(islice(players, 500)):
+                # Generate style descriptions and statistics vectors for the whole batch
+                style_descriptions = Player.generate_style_descriptions(batch)
+                stats_matrix = Player.compute_statistics_matrix(batch)
                 
-                # Generate statistics vector
-                stats_vector = player.get_statistics_vector()
+                for player, style_description, stats_vector in zip(batch, style_descriptions, stats_matrix):
+                    player.style_description = style_description
+                    player.style_embedding = stats_vector.tobytes()
+                    player.style_input_hash = player.get_style_input_hash()
                 
-                # Update player
-                player.style_description = style_description
-                player.style_embedding = stats_vector
-                player.save(update_fields=['style_description', 'style_embedding'])
+                # One bulk UPDATE per batch instead of a save() per player
+                with transaction.atomic():
+                    Player.objects.bulk_update(
+                        batch, ['style_description', 'style_embedding', 'style_input_hash']
+                    )
                 
-                updated_count += 1
+                updated_count += len(batch)
             
+            # bulk_update() bypasses the post_save signal
+            bump_data_version()
             logger.info(f"Generated embeddings for {updated_count} players")
             return updated_count
             
@@ -4,7 +4,13 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import FilterSet, NumberFilter, CharFilter, BooleanFilter
 from django.db.models import Q
+from .caching import (
+    cache_get, cache_set, cache_get_or_set,
+    lookup_cache_key, leaderboard_cache_key, similar_cache_key,
+    LOOKUP_CACHE_TIMEOUT, LEADERBOARD_CACHE_TIMEOUT, SIMILAR_CACHE_TIMEOUT,
+)
 from .models import Player
+from .search import search_players, SEARCH_FIELDS
 from .serializers import (
     PlayerListSerializer, 
     PlayerDetailSerializer, 
@@ -53,6 +59,8 @@ class PlayerFilter(FilterSet):
     
     class Meta:
         model = Player
+        # Also exposes the field__lookup parameters (e.g. goals__gte), which
+        # clients use alongside the declared names
         fields = {
             'position': ['exact', 'icontains'],
             'competition': ['exact', 'icontains'],
@@ -66,6 +74,19 @@ class PlayerFilter(FilterSet):
         }
 
 
+class PlayerSearchFilter(filters.SearchFilter):
+    """
+    ?search= filtering through the same indexed search as the search action,
+    instead of SearchFilter's per-field icontains chain.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_players(queryset, ' '.join(terms), rank=False)
+
+
 class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for player CRUD operations with comprehensive filtering and search.
@@ -78,9 +99,17 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = Player.objects.all()
     serializer_class = PlayerListSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, PlayerSearchFilter]
     filterset_class = PlayerFilter
-    search_fields = ['name', 'squad', 'nation', 'position']
+    search_fields = SEARCH_FIELDS
+    
+    # Query parameters that narrow the rows a leaderboard ranks; the cache
+    # key ignores any others, so unknown parameters share one entry
+    leaderboard_filter_params = (*PlayerFilter.base_filters, 'search', 'top_performers', 'regular_players')
+    
+    # Actions whose serializer lists its fields explicitly, so the SELECT can
+    # skip the rest (notably the stored style embedding and description)
+    projected_actions = ('list', 'search', 'leaderboard', 'stats')
     
     def get_serializer_class(self):
         """
@@ -97,6 +126,8 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
         Optionally filter queryset based on query parameters.
         """
         queryset = Player.objects.all()
+        if self.action in self.projected_actions:
+            queryset = queryset.only(*self.get_serializer_class().Meta.fields)
         
         # Additional custom filtering logic
         top_performers = self.request.query_params.get('top_performers', None)
@@ -117,8 +148,8 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
             reverse = sort_order.lower() == 'desc'
             queryset = apply_sorting(queryset, sort_by, reverse)
         else:
-            # Default sorting
-            queryset = queryset.order_by('-goals', '-assists')
+            # Default sorting, with the id breaking ties so pages stay stable
+            queryset = queryset.order_by('-goals', '-assists', 'id')
         
         return queryset
     
@@ -132,17 +163,14 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': 'Search query parameter "q" is required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Fuzzy search across multiple fields
-        queryset = self.get_queryset().filter(
-            Q(name__icontains=query) |
-            Q(squad__icontains=query) |
-            Q(nation__icontains=query) |
-            Q(position__icontains=query)
+        # Search across name, team, nation and position
+        # Apply additional filters if provided, then search within them;
+        # an explicit sort_by takes precedence over relevance
+        queryset = search_players(
+            self.filter_queryset(self.get_queryset()), query,
+            rank='sort_by' not in request.query_params
         )
         
-        # Apply additional filters if provided
-        queryset = self.filter_queryset(queryset)
-        
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -167,19 +195,34 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Filters are part of the key, so filtered leaderboards can be cached
+        filter_values = {
+            name: request.query_params.getlist(name)
+            for name in self.leaderboard_filter_params if name in request.query_params
+        }
+        cache_key = leaderboard_cache_key(stat, limit, filter_values)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
         # Apply sorting using the extensible system
         queryset = self.filter_queryset(
             self.get_queryset().filter(matches_played__gte=3)  # Minimum games filter
         )
-        queryset = apply_sorting(queryset, stat, reverse=True)[:limit]
+        # Every leaderboard field is a stored column, so rows are read as
+        # dicts in the serializer's field order instead of building models
+        players = list(
+            apply_sorting(queryset, stat, reverse=True).values(*LeaderboardSerializer.Meta.fields)[:limit]
+        )
         
-        serializer = LeaderboardSerializer(queryset, many=True)
-        return Response({
+        data = {
             'stat': stat,
             'stat_info': get_sort_options().get(stat, {}),
-            'players': serializer.data,
-            'total_count': queryset.count()
-        })
+            'players': players,
+            'total_count': len(players)
+        }
+        cache_set(cache_key, data, LEADERBOARD_CACHE_TIMEOUT)
+        return Response(data)
     
     @action(detail=True, methods=['get'])
     def stats(self, request, pk=None):
@@ -209,18 +252,25 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        cache_key = similar_cache_key(player.pk, method, limit)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
         try:
             # Find similar players using vector search
             similar_players = find_similar_players(player, limit, method)
             
             serializer = PlayerListSerializer(similar_players, many=True)
-            return Response({
+            data = {
                 'player': PlayerListSerializer(player).data,
                 'similar_players': serializer.data,
                 'method': method,
                 'limit': limit,
                 'total_found': len(similar_players)
-            })
+            }
+            cache_set(cache_key, data, SIMILAR_CACHE_TIMEOUT)
+            return Response(data)
             
         except Exception as e:
             return Response(
@@ -228,37 +278,43 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def _lookup_values(self, field):
+        """
+        Sorted distinct values of a player field, cached until players change.
+        """
+        return cache_get_or_set(
+            lookup_cache_key(field),
+            lambda: list(Player.objects.values_list(field, flat=True).distinct().order_by(field)),
+            LOOKUP_CACHE_TIMEOUT
+        )
+    
     @action(detail=False, methods=['get'])
     def positions(self, request):
         """
         Get available positions.
         """
-        positions = Player.objects.values_list('position', flat=True).distinct().order_by('position')
-        return Response(list(positions))
+        return Response(self._lookup_values('position'))
     
     @action(detail=False, methods=['get'])
     def competitions(self, request):
         """
         Get available competitions/leagues.
         """
-        competitions = Player.objects.values_list('competition', flat=True).distinct().order_by('competition')
-        return Response(list(competitions))
+        return Response(self._lookup_values('competition'))
     
     @action(detail=False, methods=['get'])
     def teams(self, request):
         """
         Get available teams/squads.
         """
-        teams = Player.objects.values_list('squad', flat=True).distinct().order_by('squad')
-        return Response(list(teams))
+        return Response(self._lookup_values('squad'))
     
     @action(detail=False, methods=['get'])
     def nations(self, request):
         """
         Get available nationalities.
         """
-        nations = Player.objects.values_list('nation', flat=True).distinct().order_by('nation')
-        return Response(list(nations))
+        return Response(self._lookup_values('nation'))
     
     @action(detail=False, methods=['get'])
     def sort_options(self, request):
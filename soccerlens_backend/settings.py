@@ -94,6 +94,10 @@ if DATABASE_URL.startswith('postgres'):
         'options': '-c search_path=public,vector'
     }
 
+# Covering index INCLUDE columns are PostgreSQL-only; SQLite builds the
+# index on its key columns alone
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -146,7 +150,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'players.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',